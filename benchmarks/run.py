@@ -0,0 +1,214 @@
+# benchmarks/run.py
+"""
+Benchmark suite: micro benchmarks (tokenize, BM25, hard filters,
+pick_best_sentence, sentence index, rules) and end-to-end analyze_plan throughput on a
+synthetic KB scaled from data/kb.
+
+    python -m benchmarks.run --scale 10 --out bench.json
+    python -m benchmarks.run --scale 10 --baseline bench.json --max-regression 0.10
+
+Results are JSON: {"meta": {...}, "results": {name: {median_s, min_s, ...}}}.
+With --baseline, each benchmark's median is compared to the baseline's and
+the exit code is 1 if any got slower by more than --max-regression.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from compliance_rag import config, retrieval
+from compliance_rag.analyze_plan import analyze_plan
+from compliance_rag.bm25 import BM25Index
+from compliance_rag.filters import FilterIndex
+from compliance_rag.normalize import chunk_tokens, tokenize
+from compliance_rag.rule_columns import RoomColumns
+from compliance_rag.rule_engine import evaluate_rooms
+from compliance_rag.rules_registry import build_rules
+from compliance_rag.text_picker import pick_best_sentence
+
+from benchmarks.synthetic import load_kb_chunks, make_plans, scale_chunks, use_kb, write_scaled_kb
+
+
+def _time(fn: Callable[[], Any], repeat: int, number: int) -> Dict[str, Any]:
+    fn()  # warm-up
+    runs: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) / number)
+    return {
+        "median_s": statistics.median(runs),
+        "min_s": min(runs),
+        "mean_s": statistics.fmean(runs),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def _evidence_queries() -> List[Dict[str, Any]]:
+    return [r.evidence_query for r in build_rules() if r.evidence_query]
+
+
+def run_suite(scale: int, seed: int, repeat: int, plans: int, rooms_per_plan: int) -> Dict[str, Any]:
+    chunks = scale_chunks(load_kb_chunks("all"), scale)
+    texts = [ch.get("text") or "" for ch in chunks]
+    docs_tokens = [chunk_tokens(ch) for ch in chunks]
+    queries = _evidence_queries()
+    query_tokens = [tokenize(retrieval.build_query(eq)) for eq in queries]
+
+    index = BM25Index(docs_tokens, backend=config.BM25_BACKEND)
+    filters = FilterIndex(chunks, index)
+    filters.text_norm(0)
+
+    rng = random.Random(seed)
+    sentence_texts = rng.sample(texts, min(200, len(texts)))
+    plan_inputs = make_plans(plans, rooms_per_plan, seed)
+    big_plan = make_plans(1, 5000, seed + 1)[0]["rooms"]
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def bench(name: str, fn: Callable[[], Any], number: int = 1, **extra: Any) -> None:
+        results[name] = {**_time(fn, repeat, number), **extra}
+        print(f"{name:<28} median {results[name]['median_s'] * 1000:10.3f} ms", file=sys.stderr)
+
+    bench("tokenize_kb", lambda: [tokenize(t) for t in texts], items=len(texts))
+    bench("bm25_rank_full_scan", lambda: [retrieval._bm25_rank(q, docs_tokens) for q in query_tokens],
+          queries=len(query_tokens))
+    bench("bm25_index_top_k", lambda: [index.top_k(q, 3) for q in query_tokens],
+          number=10, queries=len(query_tokens))
+    bench("bm25_index_build", lambda: BM25Index(docs_tokens, backend=config.BM25_BACKEND))
+
+    def hard_filters() -> None:
+        filters._hint_docs.clear()  # measure the hint scans, not the memo
+        for eq in queries:
+            filters.candidates(
+                section_hint=eq.get("section_hint"),
+                exclude_hints=eq.get("exclude_hints"),
+                must_include_all=eq.get("must_include_keywords"),
+                must_include_any=eq.get("must_include_any_keywords"),
+            )
+
+    bench("hard_filters", hard_filters, queries=len(queries))
+    bench("filter_index_normalize", lambda: FilterIndex(chunks, index).text_norm(0), items=len(chunks))
+    bench("pick_best_sentence", lambda: [pick_best_sentence(t, ["حوض", "غسيل"]) for t in sentence_texts],
+          number=5, items=len(sentence_texts))
+    sentences = retrieval._SentenceIndex(chunks)
+    sentence_ids = rng.sample(range(len(chunks)), min(200, len(chunks)))
+
+    def sentence_lookup() -> None:
+        sentences._best.clear()  # measure scoring, not the memo
+        for i in sentence_ids:
+            sentences.best(i, ["حوض", "غسيل"])
+
+    bench("sentence_index_lookup", sentence_lookup, number=5, items=len(sentence_ids))
+    bench("evaluate_rooms_5000", lambda: evaluate_rooms(big_plan), number=5, rooms=len(big_plan))
+    big_columns = RoomColumns.from_rooms(big_plan)
+    bench("evaluate_rooms_columnar_5000", lambda: evaluate_rooms(big_columns), number=5, rooms=len(big_plan))
+
+    with tempfile.TemporaryDirectory(prefix="crag_bench_") as tmp:
+        write_scaled_kb(Path(tmp), scale)
+        with use_kb(Path(tmp)):
+            def cold() -> None:
+                retrieval.clear_kb_caches()  # KB load + index build included
+                for q in queries:
+                    retrieval.retrieve_evidence(q)
+
+            def uncached() -> None:
+                retrieval.clear_evidence_cache()  # KB already loaded
+                for q in queries:
+                    retrieval.retrieve_evidence(q)
+
+            bench("retrieve_evidence_cold", cold, queries=len(queries))
+            bench("retrieve_evidence_uncached", uncached, queries=len(queries))
+
+            def e2e() -> None:
+                retrieval.clear_evidence_cache()
+                for p in plan_inputs:
+                    analyze_plan(**p)
+
+            bench("analyze_plan_e2e", e2e, plans=len(plan_inputs))
+            e2e_s = results["analyze_plan_e2e"]["median_s"]
+            results["analyze_plan_e2e"]["plans_per_s"] = len(plan_inputs) / e2e_s if e2e_s else None
+
+    try:
+        import numpy
+        numpy_version: Optional[str] = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy_version,
+            "bm25_backend": index.backend,
+            "scale": scale,
+            "seed": seed,
+            "repeat": repeat,
+            "kb_chunks": len(chunks),
+            "plans": plans,
+            "rooms_per_plan": rooms_per_plan,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Print a comparison table; return the names of regressed benchmarks."""
+    regressed: List[str] = []
+    base = baseline.get("results", {})
+    print(f"{'benchmark':<28} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, res in current["results"].items():
+        if name not in base:
+            print(f"{name:<28} {'-':>12} {res['median_s'] * 1000:12.3f} {'new':>7}")
+            continue
+        b, c = base[name]["median_s"], res["median_s"]
+        ratio = c / b if b else float("inf")
+        flag = ""
+        if ratio > 1 + max_regression:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {b * 1000:12.3f} {c * 1000:12.3f} {ratio:7.2f}{flag}")
+    return regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the compliance_rag benchmark suite.")
+    parser.add_argument("--scale", type=int, default=10, help="KB replication factor (1, 10, 100, 1000...)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--plans", type=int, default=50, help="plans in the end-to-end benchmark")
+    parser.add_argument("--rooms-per-plan", type=int, default=12)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="allowed slowdown vs baseline (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.scale, args.seed, args.repeat, args.plans, args.rooms_per_plan)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("scale") != args.scale:
+            print("warning: baseline was run with a different --scale", file=sys.stderr)
+        regressed = compare(current, baseline, args.max_regression)
+        if regressed:
+            print(f"regressed: {', '.join(regressed)}", file=sys.stderr)
+            return 1
+    elif not args.out:
+        print(json.dumps(current, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
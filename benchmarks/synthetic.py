@@ -0,0 +1,117 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic inputs for the benchmarks: room plans and a KB
+scaled up from the real `data/kb` chunks.
+"""
+import json
+import random
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from compliance_rag import config
+from compliance_rag.kb_binary import binary_path_for, write_kb_binary
+from compliance_rag.rules_registry import TABLE_LIMITS
+
+ROOM_MIX = ["Living", "Bedroom", "Bedroom", "Kitchen", "Bathroom", "WC", "Corridor", "ServiceRoom", "Unknown"]
+
+KB_FILES = {
+    "all": config.KB_ALL_PATH,
+    "sbc1101": config.KB_SBC1101_PATH,
+    "res_requirements": config.KB_RES_REQ_PATH,
+}
+
+
+def make_rooms(n_rooms: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Rooms around the table limits (some failing, some missing metrics)."""
+    rooms: List[Dict[str, Any]] = []
+    for i in range(n_rooms):
+        rtype = rng.choice(ROOM_MIX)
+        min_area, min_width = TABLE_LIMITS.get(rtype, (None, None))
+        room: Dict[str, Any] = {"id": f"R{i}", "type": rtype}
+
+        if rng.random() < 0.9:
+            area = (min_area or 5.0) * rng.uniform(0.7, 1.6)
+            width = (min_width or 1.0) * rng.uniform(0.7, 1.6)
+            room["metrics"] = {"area_sqm": round(area, 2), "min_dimension_m": round(width, 2)}
+        if rtype in ("Bathroom", "WC") and rng.random() < 0.8:
+            room["ventilation"] = {"has_window": rng.random() < 0.7}
+        rooms.append(room)
+
+    if rng.random() < 0.8:
+        rooms.append({"id": f"R{n_rooms}", "type": "ExitDoor"})
+    return rooms
+
+
+def make_plans(n_plans: int, rooms_per_plan: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """`n_plans` analyze_plan inputs ({project_id, asset_id, rooms})."""
+    rng = random.Random(seed)
+    return [
+        {"project_id": "bench", "asset_id": f"unit_{i}", "rooms": make_rooms(rooms_per_plan, rng)}
+        for i in range(n_plans)
+    ]
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_kb_chunks(name: str = "all") -> List[Dict[str, Any]]:
+    return _read_jsonl(KB_FILES[name])
+
+
+def scale_chunks(chunks: List[Dict[str, Any]], factor: int) -> List[Dict[str, Any]]:
+    """Replicate chunks `factor` times with unique chunk ids."""
+    out: List[Dict[str, Any]] = []
+    for rep in range(max(1, factor)):
+        for ch in chunks:
+            c = dict(ch)
+            c["chunk_id"] = rep * len(chunks) + int(ch.get("chunk_id") or 0)
+            out.append(c)
+    return out
+
+
+def _write_kb_file(target: Path, chunks: List[Dict[str, Any]], binary: bool) -> None:
+    with target.open("w", encoding="utf-8") as f:
+        for ch in chunks:
+            f.write(json.dumps(ch, ensure_ascii=False) + "\n")
+    if binary:
+        write_kb_binary(chunks, binary_path_for(target), source=target)
+
+
+def write_scaled_kb(out_dir: Path, factor: int, binary: bool = False) -> Path:
+    """
+    Write the per-doc KB files of `data/kb` replicated `factor` times into
+    `out_dir` (same file names), kb_all as their concatenation, plus the
+    `.built` marker. As in the real KB, each per-doc file is a contiguous
+    segment of kb_all, so retrieval serves it as a range of kb_all.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    all_chunks: List[Dict[str, Any]] = []
+    for name, path in KB_FILES.items():
+        if name == "all":
+            continue
+        chunks = scale_chunks(_read_jsonl(path), factor)
+        _write_kb_file(out_dir / path.name, chunks, binary)
+        all_chunks.extend(chunks)
+    _write_kb_file(out_dir / KB_FILES["all"].name, all_chunks, binary)
+    (out_dir / config.KB_BUILT_MARKER.name).write_text("ok", encoding="utf-8")
+    return out_dir
+
+
+@contextmanager
+def use_kb(kb_dir: Path) -> Iterator[None]:
+    """Point the runtime config at another KB directory for the block."""
+    saved = {
+        k: getattr(config, k)
+        for k in ("KB_ALL_PATH", "KB_SBC1101_PATH", "KB_RES_REQ_PATH", "KB_BUILT_MARKER", "EVIDENCE_TABLE_PATH")
+    }
+    try:
+        for k, v in saved.items():
+            setattr(config, k, Path(kb_dir) / v.name)
+        yield
+    finally:
+        for k, v in saved.items():
+            setattr(config, k, v)
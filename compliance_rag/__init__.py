@@ -1,3 +1,61 @@
 # src/__init__.py
-from .analyze_plan import analyze_plan
-from .retrieval import retrieve_evidence
+"""
+Public API. Submodules are imported on first attribute access (PEP 562),
+so e.g. rules-only consumers of `compliance_rag.rule_engine` never load
+retrieval, and `import compliance_rag` stays cheap.
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Any, Dict, List
+
+_EXPORTS: Dict[str, str] = {
+    "analyze_plan": ".analyze_plan",
+    "analyze_plan_async": ".analyze_plan",
+    "analyze_building": ".analyze_building",
+    "iter_building_results": ".analyze_building",
+    "shutdown_executors": ".analyze_building",
+    "analyze_plan_incremental": ".incremental",
+    "PlanHandle": ".incremental",
+    "evaluate_rooms": ".rule_engine",
+    "retrieve_evidence": ".retrieval",
+    "retrieve_evidence_batch": ".retrieval",
+    "warmup": ".preload",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .analyze_building import analyze_building, iter_building_results, shutdown_executors
+    from .analyze_plan import analyze_plan, analyze_plan_async
+    from .incremental import PlanHandle, analyze_plan_incremental
+    from .preload import warmup
+    from .retrieval import retrieve_evidence, retrieve_evidence_batch
+    from .rule_engine import evaluate_rooms
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:
+        # `analyze_plan` / `analyze_building` are also submodule names: when the
+        # import system binds the submodule here, keep the function instead
+        if isinstance(value, types.ModuleType) and _EXPORTS.get(name) == "." + name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,185 @@
+# src/analyze_building.py
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import config
+from .analyze_plan import analyze_plan
+from .preload import warmup
+
+POOLS = ("process", "thread", "serial")
+
+
+def _analyze_unit(project_id: str, index: int, unit: Dict[str, Any]) -> Dict[str, Any]:
+    """Run `analyze_plan` for one unit; errors are returned, not raised."""
+    asset_id = unit.get("asset_id")
+    try:
+        result = analyze_plan(project_id=project_id, asset_id=asset_id, rooms=unit.get("rooms"))
+    except Exception as e:
+        return {"index": index, "project_id": project_id, "asset_id": asset_id, "error": repr(e)}
+    result["index"] = index
+    return result
+
+
+def _make_executor(pool: str, workers: int, start_method: Optional[str]) -> Executor:
+    if pool == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compliance_rag_building")
+
+    # "fork" shares the preloaded KB (indexes, mmap'd binary KB) copy-on-write,
+    # but is unsafe once the process runs threads; other start methods load
+    # it again in each worker
+    ctx = multiprocessing.get_context(start_method) if start_method else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+
+
+# (pool, workers, start method) -> executor shared by every call in this process
+_SHARED: Dict[Tuple[str, int, Optional[str]], Executor] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_executor(
+    pool: str = config.BUILDING_POOL,
+    max_workers: Optional[int] = config.BUILDING_MAX_WORKERS,
+    start_method: Optional[str] = config.BUILDING_START_METHOD,
+) -> Executor:
+    """
+    The process-wide "process" or "thread" pool for these settings, created
+    on first use (after warming up the KB and rule plan in this process, so
+    forked workers inherit them) and reused by later calls.
+
+    start_method: multiprocessing start method of a process pool
+    (None = the platform default).
+    """
+    if pool not in ("process", "thread"):
+        raise ValueError(f"no shared executor for pool {pool!r}")
+    workers = max_workers or os.cpu_count() or 1
+    key = (pool, workers, start_method if pool == "process" else None)
+    with _SHARED_LOCK:
+        ex = _SHARED.get(key)
+        if ex is None:
+            warmup(freeze=False)
+            ex = _SHARED[key] = _make_executor(pool, workers, key[2])
+        return ex
+
+
+def _discard_shared(ex: Executor) -> None:
+    """Forget a broken shared pool so the next call creates a fresh one."""
+    with _SHARED_LOCK:
+        for key, shared in list(_SHARED.items()):
+            if shared is ex:
+                del _SHARED[key]
+    ex.shutdown(wait=False)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down every shared pool (they are recreated on next use)."""
+    with _SHARED_LOCK:
+        pools = list(_SHARED.values())
+        _SHARED.clear()
+    for ex in pools:
+        ex.shutdown(wait=wait)
+
+
+def iter_building_results(
+    project_id: str,
+    units: List[Dict[str, Any]],
+    *,
+    pool: str = config.BUILDING_POOL,
+    max_workers: Optional[int] = config.BUILDING_MAX_WORKERS,
+    executor: Optional[Executor] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze every unit ({"asset_id", "rooms"}) and yield each unit's result
+    as soon as it finishes (completion order; `result["index"]` is the
+    unit's position in `units`). A unit that fails yields
+    {"index", "project_id", "asset_id", "error"} instead.
+
+    pool: "process" (default), "thread" or "serial"; the pool is the shared
+    one from `shared_executor`. A caller-owned `executor` is used instead
+    (and never shut down here).
+    """
+    if pool not in POOLS:
+        raise ValueError(f"unknown pool {pool!r}; expected one of {POOLS}")
+
+    units = list(units or [])
+    if executor is None and (pool == "serial" or len(units) <= 1):
+        for i, unit in enumerate(units):
+            yield _analyze_unit(project_id, i, unit)
+        return
+
+    ex = executor or shared_executor(pool, max_workers, config.BUILDING_START_METHOD)
+    futures = [ex.submit(_analyze_unit, project_id, i, unit) for i, unit in enumerate(units)]
+    try:
+        for fut in as_completed(futures):
+            yield fut.result()
+    except BrokenExecutor:
+        if executor is None:
+            _discard_shared(ex)
+        raise
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def summarize_building(unit_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Building-level totals from per-unit results."""
+    summary: Dict[str, Any] = {
+        "units_total": len(unit_results),
+        "units_failed": 0,
+        "units_with_violations": 0,
+        "rooms_total": 0,
+        "violations_total": 0,
+        "warnings_total": 0,
+        "skipped_missing_data": 0,
+        "violations_by_rule": {},
+    }
+    by_rule: Dict[str, int] = summary["violations_by_rule"]
+
+    for res in unit_results:
+        if "error" in res:
+            summary["units_failed"] += 1
+            continue
+
+        unit_summary = res.get("summary") or {}
+        for key in ("rooms_total", "violations_total", "warnings_total", "skipped_missing_data"):
+            summary[key] += int(unit_summary.get(key) or 0)
+
+        if unit_summary.get("violations_total"):
+            summary["units_with_violations"] += 1
+
+        for v in res.get("violations") or []:
+            rid = v.get("rule_id")
+            by_rule[rid] = by_rule.get(rid, 0) + 1
+
+    return summary
+
+
+def analyze_building(
+    project_id: str,
+    units: List[Dict[str, Any]],
+    *,
+    pool: str = config.BUILDING_POOL,
+    max_workers: Optional[int] = config.BUILDING_MAX_WORKERS,
+    executor: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze all units of a building in parallel (see `iter_building_results`
+    for the pool arguments).
+
+    Returns {"project_id", "summary", "units"}; `units` holds the per-unit
+    `analyze_plan` results in input order.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(units or [])
+    for res in iter_building_results(project_id, units, pool=pool, max_workers=max_workers, executor=executor):
+        results[res.pop("index")] = res
+
+    unit_results = [r for r in results if r is not None]
+    return {
+        "project_id": project_id,
+        "summary": summarize_building(unit_results),
+        "units": unit_results,
+    }
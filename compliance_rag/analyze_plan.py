@@ -1,10 +1,16 @@
 # src/analyze_plan.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+import asyncio
+import contextvars
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
+from .evidence_table import current_table
+from .instrumentation import count, stage, trace
 from .rule_engine import evaluate_rooms
-from .retrieval import retrieve_evidence
-from .text_picker import pick_best_sentence
+from .retrieval import _cache_key, hit_sentence, retrieve_evidence_batch
 
 from . import config
 
@@ -59,52 +65,266 @@ def _format_for_reading(result: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 
+def _evidence_request(item: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Return (evidence_query, prefer keywords) for a violation/warning item."""
+    eq = item.get("evidence_query") or {}
+    prefer: List[str] = []
+
+    # Narrow evidence search for specific rule IDs when needed.
+    if item.get("rule_id") == "SBC-UNIT-MIN-1-KITCHEN":
+        eq = dict(eq)
+        eq["must_include_any_keywords"] = ["مطبخ", "بمطبخ", "بالمطبخ", "مطابخ"]
+        prefer = ["مطبخ", "بمطبخ", "حوض", "غسيل"]
+
+    elif item.get("rule_id") == "SBC-UNIT-MIN-1-EXIT-DOOR":
+        prefer = ["باب", "خروج", "وحدة سكنية"]
+
+    return eq, prefer
+
+
+def _attach_evidence(
+    item: Dict[str, Any],
+    evidence: List[Dict[str, Any]],
+    prefer: List[str],
+    sentence: Optional[str] = None,
+) -> None:
+    """Attach evidence and rule_sentence (`sentence`: precomputed for the top hit, if known)."""
+    item["evidence"] = evidence
+
+    # Table rules use a deterministic sentence.
+    if _is_table_rule(item.get("rule_id", "")):
+        item["rule_sentence"] = _make_table_rule_sentence(item)
+        item["evidence_used"] = evidence[:1]
+        return
+
+    # Pick one short requirement sentence from the top evidence chunk.
+    if evidence:
+        best = evidence[0]
+        item["rule_sentence"] = sentence if sentence is not None else hit_sentence(best, prefer)
+        item["evidence_used"] = [best]
+
+
+Pending = List[Tuple[Dict[str, Any], Dict[str, Any], List[str]]]
+
+
+def _pending_evidence(result: Dict[str, Any], kb_is_ready: bool) -> Pending:
+    """
+    (item, evidence_query, prefer) for every item that needs live retrieval.
+    Items whose rule is in the static evidence table get their evidence here.
+    """
+    pending: Pending = []
+    table = current_table() if kb_is_ready else None
+
+    for bucket in ("violations", "warnings"):
+        for item in result.get(bucket, []):
+            if not item.get("evidence_query"):
+                continue
+
+            if not kb_is_ready:
+                item["evidence"] = []
+                continue
+
+            eq, prefer = _evidence_request(item)
+            found = table.get(item.get("rule_id"), eq) if table is not None else None
+            if found is not None:
+                count("evidence_table_hits")
+                _attach_evidence(item, found[0], prefer, found[1])
+                continue
+            pending.append((item, eq, prefer))
+
+    return pending
+
+
+def _evaluate(rooms: List[Dict[str, Any]]) -> Dict[str, Any]:
+    with stage("rules"):
+        return evaluate_rooms(rooms)
+
+
+def _evaluate_pending(rooms: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Pending]:
+    result = _evaluate(rooms)
+    return result, _pending_evidence(result, config.kb_ready())
+
+
+def _finish(project_id: str, asset_id: str, result: Dict[str, Any], pending: Pending, evidence_lists) -> Dict[str, Any]:
+    with stage("sentence"):
+        for (item, _, prefer), evidence in zip(pending, evidence_lists):
+            _attach_evidence(item, evidence, prefer)
+
+    with stage("format"):
+        final = {"project_id": project_id, "asset_id": asset_id, **result}
+        return _format_for_reading(final)
+
+
+def _analyze(project_id: str, asset_id: str, rooms: List[Dict[str, Any]]) -> Dict[str, Any]:
+    result, pending = _evaluate_pending(rooms)
+
+    # One batched retrieval; identical queries are only scored once.
+    with stage("retrieval"):
+        evidence_lists = retrieve_evidence_batch([eq for _, eq, _ in pending], top_k=3)
+
+    return _finish(project_id, asset_id, result, pending, evidence_lists)
+
+
 def analyze_plan(
     *,
     project_id: str,
     asset_id: str,
     rooms: Optional[List[Dict[str, Any]]] = None,
+    debug: bool = False,
 ) -> Dict[str, Any]:
+    """
+    Check a unit's rooms against the rules and attach KB evidence.
+    `rooms` may also be a `rule_columns.RoomColumns` (large buildings
+    already held column-wise).
+    debug=True adds a per-stage timing/counter "trace" to the output.
+    """
     rooms = rooms or []
-    result = evaluate_rooms(rooms)
-    kb_is_ready = config.kb_ready()
+    if not debug:
+        return _analyze(project_id, asset_id, rooms)
 
-    for bucket in ("violations", "warnings"):
-        for item in result.get(bucket, []):
-            eq = item.get("evidence_query") or {}
-            if not eq:
-                continue
+    with trace() as t:
+        out = _analyze(project_id, asset_id, rooms)
+    out["trace"] = t.to_dict()
+    return out
 
-            prefer: List[str] = []
 
-            # Narrow evidence search for specific rule IDs when needed.
-            if item.get("rule_id") == "SBC-UNIT-MIN-1-KITCHEN":
-                eq = dict(eq)
-                eq["must_include_any_keywords"] = ["مطبخ", "بمطبخ", "بالمطبخ", "مطابخ"]
-                prefer = ["مطبخ", "بمطبخ", "حوض", "غسيل"]
+# --- asyncio entrypoint -------------------------------------------------------
 
-            elif item.get("rule_id") == "SBC-UNIT-MIN-1-EXIT-DOOR":
-                prefer = ["باب", "خروج", "وحدة سكنية"]
-           
-            if not kb_is_ready:
-                item["evidence"] = []
-                continue
-            
-            evidence = retrieve_evidence(eq, top_k=3)
-            item["evidence"] = evidence
-
-            # Table rules use a deterministic sentence.
-            if _is_table_rule(item.get("rule_id", "")):
-                item["rule_sentence"] = _make_table_rule_sentence(item)
-                item["evidence_used"] = evidence[:1]
-                continue
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# event loop -> {evidence cache key: future of its hits} for queries being retrieved
+_IN_FLIGHT: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=config.ASYNC_MAX_WORKERS,
+                thread_name_prefix="compliance_rag",
+            )
+        return _EXECUTOR
+
+
+async def _evidence_async(
+    queries: List[Dict[str, Any]],
+    top_k: int,
+    executor: Executor,
+) -> List[List[Dict[str, Any]]]:
+    """
+    `retrieve_evidence_batch` off the event loop. A query already being
+    retrieved for another request is awaited instead of scored again.
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = _IN_FLIGHT.setdefault(loop, {})
+    min_score = config.DEFAULT_MIN_SCORE
+
+    keys = [_cache_key(eq, top_k, min_score) for eq in queries]
+    futures: Dict[Any, asyncio.Future] = {}
+    mine: Dict[Any, Dict[str, Any]] = {}
+
+    for key, eq in zip(keys, queries):
+        if key in futures:
+            continue
+        fut = in_flight.get(key)
+        if fut is None:
+            fut = in_flight[key] = loop.create_future()
+            mine[key] = eq
+        futures[key] = fut
+
+    if mine:
+        own_keys = list(mine)
+
+        def settle(done: asyncio.Future) -> None:
+            # runs even if the request that started the batch was cancelled,
+            # so every other request waiting on these queries gets its result
+            for i, key in enumerate(own_keys):
+                fut = futures[key]
+                if in_flight.get(key) is fut:
+                    del in_flight[key]
+                if fut.done():
+                    continue
+                if done.cancelled():
+                    fut.cancel()
+                elif done.exception() is not None:
+                    fut.set_exception(done.exception())
+                else:
+                    fut.set_result(done.result()[i])
+
+        batch = loop.run_in_executor(
+            executor,
+            contextvars.copy_context().run,
+            retrieve_evidence_batch,
+            [mine[key] for key in own_keys],
+            top_k,
+            min_score,
+        )
+        batch.add_done_callback(settle)
+
+    # shield: cancelling this request must not cancel a shared retrieval
+    results = {key: await asyncio.shield(fut) for key, fut in futures.items()}
+    return [[dict(h) for h in results[key]] for key in keys]
+
+
+async def analyze_plan_async(
+    *,
+    project_id: str,
+    asset_id: str,
+    rooms: Optional[List[Dict[str, Any]]] = None,
+    executor: Optional[Executor] = None,
+    debug: bool = False,
+) -> Dict[str, Any]:
+    """
+    `analyze_plan` for asyncio callers: rule evaluation, the evidence table
+    read, evidence retrieval and sentence picking all run on a bounded
+    executor (config.ASYNC_MAX_WORKERS threads by default), so the event
+    loop never blocks on them.
+
+    Identical evidence queries in flight for concurrent requests are
+    retrieved once. Cancelling the awaiting task abandons the request;
+    work already shared with other requests still completes for them.
+    """
+    rooms = rooms or []
+    if not debug:
+        return await _analyze_async(project_id, asset_id, rooms, executor)
+
+    with trace() as t:
+        out = await _analyze_async(project_id, asset_id, rooms, executor)
+    out["trace"] = t.to_dict()
+    return out
+
+
+async def _analyze_async(
+    project_id: str,
+    asset_id: str,
+    rooms: List[Dict[str, Any]],
+    executor: Optional[Executor],
+) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    executor = executor or _default_executor()
+
+    # copy_context: executor threads see this request's trace. The evidence
+    # table read and sentence lookups (which can load the KB) run there too.
+    result, pending = await loop.run_in_executor(
+        executor, contextvars.copy_context().run, _evaluate_pending, rooms,
+    )
 
-            # Pick one short sentence from the top evidence chunk.
-            if evidence:
-                best = evidence[0]
-                sentence = pick_best_sentence(best.get("quote", ""), prefer=prefer)
-                item["rule_sentence"] = sentence
-                item["evidence_used"] = [best]
+    evidence_lists: List[List[Dict[str, Any]]] = []
+    if pending:
+        with stage("retrieval"):
+            evidence_lists = await _evidence_async([eq for _, eq, _ in pending], 3, executor)
 
-    final = {"project_id": project_id, "asset_id": asset_id, **result}
-    return _format_for_reading(final)
+    return await loop.run_in_executor(
+        executor,
+        contextvars.copy_context().run,
+        _finish,
+        project_id,
+        asset_id,
+        result,
+        pending,
+        evidence_lists,
+    )
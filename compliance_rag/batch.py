@@ -0,0 +1,161 @@
+# src/batch.py
+"""
+Bulk compliance checks over NDJSON plan records.
+
+Input: one JSON object per line, {"project_id", "asset_id", "rooms"}.
+Output: one JSON object per input record, the `analyze_plan` result plus
+"line" (1-based input line number), or a failure record
+{"line", "project_id", "asset_id", "error"} for an unreadable/invalid input.
+
+    python -m compliance_rag.batch plans.ndjson -o results.ndjson
+    cat plans.ndjson | python -m compliance_rag.batch --unordered > results.ndjson
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, Executor, Future, as_completed, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from . import config
+from .analyze_building import POOLS, _discard_shared, shared_executor, shutdown_executors
+from .analyze_plan import analyze_plan
+
+
+def _process_line(line_no: int, line: str) -> Dict[str, Any]:
+    """Parse and analyze one NDJSON record; never raises."""
+    record: Any = None
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("record must be a JSON object")
+        rooms = record.get("rooms")
+        if rooms is not None and not isinstance(rooms, list):
+            raise ValueError("'rooms' must be a list")
+        result = analyze_plan(
+            project_id=record.get("project_id"),
+            asset_id=record.get("asset_id"),
+            rooms=rooms,
+        )
+    except Exception as e:
+        rec = record if isinstance(record, dict) else {}
+        return {
+            "line": line_no,
+            "project_id": rec.get("project_id"),
+            "asset_id": rec.get("asset_id"),
+            "error": repr(e),
+        }
+    return {"line": line_no, **result}
+
+
+def _records(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for line_no, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def run_batch(
+    lines: Iterable[str],
+    out: TextIO,
+    *,
+    pool: str = config.BUILDING_POOL,
+    max_workers: Optional[int] = config.BUILDING_MAX_WORKERS,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = True,
+    executor: Optional[Executor] = None,
+) -> Dict[str, int]:
+    """
+    Check every NDJSON plan record from `lines` and write one result line
+    per record to `out` as soon as it is available.
+
+    At most `max_in_flight` records (default: 4 per worker) are read ahead
+    of the output, so memory stays bounded on arbitrarily large inputs.
+    ordered=True writes results in input order, otherwise in completion order.
+    Records run on the shared pool of `analyze_building.shared_executor`,
+    or on a caller-owned `executor` (never shut down here).
+
+    Returns {"records", "ok", "failed"}.
+    """
+    if pool not in POOLS:
+        raise ValueError(f"unknown pool {pool!r}; expected one of {POOLS}")
+
+    stats = {"records": 0, "ok": 0, "failed": 0}
+
+    def emit(res: Dict[str, Any]) -> None:
+        stats["records"] += 1
+        stats["failed" if "error" in res else "ok"] += 1
+        out.write(json.dumps(res, ensure_ascii=False) + "\n")
+
+    if executor is None and pool == "serial":
+        for line_no, line in _records(lines):
+            emit(_process_line(line_no, line))
+        return stats
+
+    workers = max_workers or os.cpu_count() or 1
+    limit = max(1, max_in_flight or 4 * workers)
+    ex = executor or shared_executor(pool, workers, config.BUILDING_START_METHOD)
+
+    try:
+        if ordered:
+            queue: Deque[Future] = deque()
+            for line_no, line in _records(lines):
+                while queue and (len(queue) >= limit or queue[0].done()):
+                    emit(queue.popleft().result())
+                queue.append(ex.submit(_process_line, line_no, line))
+            while queue:
+                emit(queue.popleft().result())
+        else:
+            running: Set[Future] = set()
+            for line_no, line in _records(lines):
+                if len(running) >= limit:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        emit(fut.result())
+                running.add(ex.submit(_process_line, line_no, line))
+            for fut in as_completed(running):
+                emit(fut.result())
+    except BrokenExecutor:
+        if executor is None:
+            _discard_shared(ex)
+        raise
+
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run compliance checks over NDJSON plan records.")
+    parser.add_argument("input", nargs="?", default="-", help="NDJSON input file ('-' = stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file ('-' = stdout)")
+    parser.add_argument("--pool", choices=POOLS, default=config.BUILDING_POOL)
+    parser.add_argument("--workers", type=int, default=config.BUILDING_MAX_WORKERS, help="default: CPU count")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="records read ahead (default: 4 per worker)")
+    parser.add_argument("--unordered", action="store_true", help="write results in completion order")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(
+            src,
+            dst,
+            pool=args.pool,
+            max_workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            ordered=not args.unordered,
+        )
+    finally:
+        shutdown_executors()
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    print(f"{stats['records']} records, {stats['ok']} ok, {stats['failed']} failed", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
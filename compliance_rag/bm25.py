@@ -0,0 +1,376 @@
+# src/bm25.py
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: the stdlib scorer is used without it
+    np = None
+
+BACKENDS = ("auto", "numpy", "python")
+
+
+class RangeStats(NamedTuple):
+    """Collection statistics over a contiguous doc range [lo, hi)."""
+    lo: int
+    hi: int
+    n_docs: int
+    avgdl: float
+    idf: Dict[str, float]
+    bounds: Dict[str, Tuple[int, int]]  # token -> slice of its posting list in range
+
+
+def _as_range(candidates: Optional[Sequence[int]]) -> Optional[range]:
+    if isinstance(candidates, range) and candidates.step == 1:
+        return candidates
+    return None
+
+
+class BM25Index:
+    """
+    Inverted BM25 index over pre-tokenized documents (no external deps).
+
+    Built once per KB; queries only walk the postings of their own tokens.
+    Scores match `retrieval._bm25_rank` run over the same documents, including
+    when scoring is restricted to a subset of candidate documents (collection
+    statistics are then taken over that subset, as the filtered scan did).
+
+    Ranking (`hits`, `top_k`, `top_k_many`) runs on a vectorized NumPy backend
+    when available (backend="auto"/"numpy") and produces the same scores and
+    order as the stdlib path.
+
+    Candidates given as a `range` (a doc's segment of a combined KB) are
+    scored with that range's statistics, computed once (`range_stats`)
+    instead of per query; scores equal the subset path's.
+    """
+
+    def __init__(
+        self,
+        docs_tokens: Iterable[Sequence[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        backend: str = "auto",
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown BM25 backend {backend!r}; expected one of {BACKENDS}")
+        if backend == "numpy" and np is None:
+            raise RuntimeError("BM25 backend 'numpy' requested but numpy is not installed")
+
+        self.k1 = k1
+        self.b = b
+        self.backend = "python" if backend == "python" or np is None else "numpy"
+        self._np_scorer: Optional[_NumpyScorer] = None
+        self._ranges: Dict[Tuple[int, int], RangeStats] = {}
+        self._lists: Optional[Dict[str, Tuple[List[int], List[Tuple[int, int]]]]] = None
+
+        # token -> {doc index: term frequency}, doc indexes in ascending order
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_len: List[int] = []
+
+        for i, toks in enumerate(docs_tokens):
+            self.doc_len.append(len(toks))
+            for w in toks:
+                p = self.postings.get(w)
+                if p is None:
+                    p = self.postings[w] = {}
+                p[i] = p.get(i, 0) + 1
+
+        self.n_docs = len(self.doc_len)
+        self.avgdl = (sum(self.doc_len) / max(1, self.n_docs)) or 1.0
+        self.idf: Dict[str, float] = {
+            w: self._idf(len(p), self.n_docs) for w, p in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _numpy(self) -> Optional["_NumpyScorer"]:
+        if self.backend != "numpy":
+            return None
+        if self._np_scorer is None:
+            self._np_scorer = _NumpyScorer(self)
+        return self._np_scorer
+
+    @staticmethod
+    def _idf(n: int, N: int) -> float:
+        return math.log(1 + (N - n + 0.5) / (n + 0.5))
+
+    def _posting_lists(self) -> Dict[str, Tuple[List[int], List[Tuple[int, int]]]]:
+        """Postings as (sorted doc ids, (doc, tf) items) lists, for range slicing."""
+        if self._lists is None:
+            self._lists = {w: (list(p), list(p.items())) for w, p in self.postings.items()}
+        return self._lists
+
+    def range_stats(self, lo: int, hi: int) -> RangeStats:
+        """N, avgdl, idf and posting bounds over docs [lo, hi), computed once and kept."""
+        stats = self._ranges.get((lo, hi))
+        if stats is None:
+            N = max(0, hi - lo)
+            avgdl = (sum(self.doc_len[lo:hi]) / max(1, N)) or 1.0
+            idf: Dict[str, float] = {}
+            bounds: Dict[str, Tuple[int, int]] = {}
+            for w, (docs, _) in self._posting_lists().items():
+                a = bisect.bisect_left(docs, lo)
+                z = bisect.bisect_left(docs, hi, a)
+                if z > a:
+                    idf[w] = self._idf(z - a, N)
+                    bounds[w] = (a, z)
+            stats = self._ranges[(lo, hi)] = RangeStats(lo, hi, N, avgdl, idf, bounds)
+        return stats
+
+    def score(
+        self,
+        query_tokens: Sequence[str],
+        candidates: Optional[Sequence[int]] = None,
+    ) -> Dict[int, float]:
+        """
+        Return {doc index: score} for documents matching at least one query token.
+
+        When `candidates` is given, only those documents are scored and N, avgdl
+        and document frequencies are computed over them.
+        """
+        k1, b = self.k1, self.b
+
+        cand = None
+        span = _as_range(candidates)
+        if span is not None:
+            stats = self.range_stats(span.start, span.stop)
+            N, avgdl = stats.n_docs, stats.avgdl
+            lists = self._posting_lists()
+        elif candidates is None:
+            N = self.n_docs
+            avgdl = self.avgdl
+        else:
+            cand = set(candidates)
+            N = len(cand)
+            avgdl = (sum(self.doc_len[i] for i in cand) / max(1, N)) or 1.0
+
+        if N == 0:
+            return {}
+
+        scores: Dict[int, float] = {}
+        for w in query_tokens:
+            p = self.postings.get(w)
+            if not p:
+                continue
+
+            if span is not None:
+                bound = stats.bounds.get(w)
+                if bound is None:
+                    continue
+                idf = stats.idf[w]
+                items = lists[w][1][bound[0]:bound[1]]
+            elif cand is None:
+                idf = self.idf[w]
+                items = p.items()
+            else:
+                items = [(d, f) for d, f in p.items() if d in cand]
+                if not items:
+                    continue
+                idf = self._idf(len(items), N)
+
+            for d, f in items:
+                dl = self.doc_len[d] or 1
+                denom = f + k1 * (1 - b + b * (dl / avgdl))
+                scores[d] = scores.get(d, 0.0) + idf * (f * (k1 + 1) / denom)
+
+        return scores
+
+    def hits(
+        self,
+        query_tokens: Sequence[str],
+        candidates: Optional[Sequence[int]] = None,
+        min_score: float = 0.0,
+    ) -> List[Tuple[int, float]]:
+        """
+        All (doc index, score) with score >= min_score, in corpus order.
+        With min_score <= 0, unmatched candidates qualify with a 0.0 score.
+        """
+        scorer = self._numpy()
+        if scorer is not None:
+            return scorer.hits(query_tokens, candidates, min_score)
+
+        scores = self.score(query_tokens, candidates)
+        if min_score > 0:
+            ids: Iterable[int] = sorted(scores)
+        else:
+            ids = candidates if candidates is not None else range(self.n_docs)
+        return [(i, scores.get(i, 0.0)) for i in ids if scores.get(i, 0.0) >= min_score]
+
+    def top_k(
+        self,
+        query_tokens: Sequence[str],
+        k: int,
+        candidates: Optional[Sequence[int]] = None,
+        min_score: float = 0.0,
+    ) -> List[Tuple[int, float]]:
+        """Best k (doc index, score) of `hits`, by score desc then corpus order."""
+        return self.top_k_many([query_tokens], k, candidates, min_score)[0]
+
+    def top_k_many(
+        self,
+        queries: Sequence[Sequence[str]],
+        k: int,
+        candidates: Optional[Sequence[int]] = None,
+        min_score: float = 0.0,
+    ) -> List[List[Tuple[int, float]]]:
+        """`top_k` for several queries sharing the same candidate set."""
+        if k <= 0:
+            return [[] for _ in queries]
+
+        scorer = self._numpy()
+        if scorer is not None:
+            return scorer.top_k_many(queries, k, candidates, min_score)
+
+        out: List[List[Tuple[int, float]]] = []
+        for query_tokens in queries:
+            scores = self.score(query_tokens, candidates)
+            ranked = heapq.nsmallest(
+                k,
+                ((d, s) for d, s in scores.items() if s >= min_score),
+                key=lambda x: (-x[1], x[0]),
+            )
+            if len(ranked) < k and min_score <= 0:
+                # unmatched candidates tie at 0.0, after every positive score
+                for d in candidates if candidates is not None else range(self.n_docs):
+                    if d not in scores:
+                        ranked.append((d, 0.0))
+                        if len(ranked) == k:
+                            break
+            out.append(ranked)
+        return out
+
+
+class _NumpyScorer:
+    """
+    Term-major CSR view of a BM25Index (postings as doc-id / tf arrays) with
+    doc lengths as arrays. Arithmetic follows `BM25Index.score` operation by
+    operation so float results are bit-identical.
+    """
+
+    def __init__(self, index: BM25Index) -> None:
+        self.index = index
+        self.term_id: Dict[str, int] = {}
+        indptr = [0]
+        docs: List[int] = []
+        tfs: List[int] = []
+        for w, p in index.postings.items():
+            self.term_id[w] = len(self.term_id)
+            docs.extend(p.keys())
+            tfs.extend(p.values())
+            indptr.append(len(docs))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.docs = np.asarray(docs, dtype=np.int64)
+        self.tfs = np.asarray(tfs, dtype=np.float64)
+        self.doc_len = np.asarray(index.doc_len, dtype=np.int64)
+        self.dl = np.maximum(self.doc_len, 1).astype(np.float64)
+
+    def _mask(self, candidates: Optional[Sequence[int]]):
+        if candidates is None:
+            return None
+        mask = np.zeros(self.index.n_docs, dtype=bool)
+        mask[np.asarray(candidates, dtype=np.int64)] = True
+        return mask
+
+    def score_matrix(self, queries: Sequence[Sequence[str]], mask, span: Optional[range] = None):
+        """
+        Dense (len(queries), n_docs) score matrix; unmatched docs score 0.0.
+        With `span`, scoring is restricted to that doc range (its cached stats).
+        """
+        index = self.index
+        k1, b = index.k1, index.b
+
+        stats = None
+        if span is not None:
+            stats = index.range_stats(span.start, span.stop)
+            N, avgdl = stats.n_docs, stats.avgdl
+        elif mask is None:
+            N = index.n_docs
+            avgdl = index.avgdl
+        else:
+            N = int(mask.sum())
+            avgdl = (int(self.doc_len[mask].sum()) / max(1, N)) or 1.0
+
+        out = np.zeros((len(queries), index.n_docs), dtype=np.float64)
+        if N == 0:
+            return out
+
+        contrib: Dict[str, Optional[Tuple[object, object]]] = {}
+        for qi, query_tokens in enumerate(queries):
+            row = out[qi]
+            for w in query_tokens:
+                if w not in contrib:
+                    contrib[w] = None
+                    t = self.term_id.get(w)
+                    if t is not None:
+                        lo, hi = self.indptr[t], self.indptr[t + 1]
+                        docs, f = self.docs[lo:hi], self.tfs[lo:hi]
+                        if stats is not None:
+                            # CSR rows keep posting order: the range is one slice
+                            a, z = stats.bounds.get(w, (0, 0))
+                            docs, f = docs[a:z], f[a:z]
+                            idf = stats.idf.get(w, 0.0)
+                        elif mask is None:
+                            idf = index.idf[w]
+                        else:
+                            keep = mask[docs]
+                            docs, f = docs[keep], f[keep]
+                            idf = index._idf(int(docs.size), N)
+                        if docs.size:
+                            dl = self.dl[docs]
+                            denom = f + k1 * (1 - b + b * (dl / avgdl))
+                            contrib[w] = (docs, idf * (f * (k1 + 1) / denom))
+
+                c = contrib[w]
+                if c is not None:
+                    # doc ids are unique within a posting list
+                    row[c[0]] += c[1]
+        return out
+
+    def _valid(self, row, mask, min_score: float, span: Optional[range] = None):
+        if span is not None:
+            return np.flatnonzero(row[span.start:span.stop] >= min_score) + span.start
+        valid = row >= min_score
+        if mask is not None:
+            valid &= mask
+        return np.flatnonzero(valid)
+
+    def hits(
+        self,
+        query_tokens: Sequence[str],
+        candidates: Optional[Sequence[int]],
+        min_score: float,
+    ) -> List[Tuple[int, float]]:
+        span = _as_range(candidates)
+        mask = None if span is not None else self._mask(candidates)
+        row = self.score_matrix([query_tokens], mask, span)[0]
+        ids = self._valid(row, mask, min_score, span)
+        return list(zip(ids.tolist(), row[ids].tolist()))
+
+    def top_k_many(
+        self,
+        queries: Sequence[Sequence[str]],
+        k: int,
+        candidates: Optional[Sequence[int]],
+        min_score: float,
+    ) -> List[List[Tuple[int, float]]]:
+        span = _as_range(candidates)
+        mask = None if span is not None else self._mask(candidates)
+        matrix = self.score_matrix(queries, mask, span)
+
+        out: List[List[Tuple[int, float]]] = []
+        for row in matrix:
+            ids = self._valid(row, mask, min_score, span)
+            if ids.size > k:
+                vals = row[ids]
+                kth = np.partition(vals, ids.size - k)[ids.size - k]
+                ids = ids[vals >= kth]  # keeps every tie at the cut-off
+            order = np.lexsort((ids, -row[ids]))[:k]
+            sel = ids[order]
+            out.append(list(zip(sel.tolist(), row[sel].tolist())))
+        return out
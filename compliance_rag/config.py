@@ -17,13 +17,41 @@ KB_ALL_PATH = KB_DIR / "kb_all_chunks.jsonl"
 KB_SBC1101_PATH = KB_DIR / "sbc1101_chunks.jsonl"
 KB_RES_REQ_PATH = KB_DIR / "res_requirements_chunks.jsonl"
 
+# Build state: marker written last by the KB builders, and the incremental
+# ingest manifest (per-doc source/segment hashes, see scripts/ingest_kb.py)
+KB_BUILT_MARKER = KB_DIR / ".built"
+KB_MANIFEST_PATH = KB_DIR / "manifest.json"
+
+# Evidence + rule_sentence of every built-in rule, resolved at build time
+# (see evidence_table.py); rules missing from it use live retrieval
+EVIDENCE_TABLE_PATH = KB_DIR / "evidence_table.json"
+
 DEFAULT_TOP_K = 3
 DEFAULT_MIN_SCORE = 0.1
 
+# Max distinct (evidence_query, top_k, min_score) results kept in memory (0 disables)
+EVIDENCE_CACHE_SIZE = 1024
+
+# BM25 ranking backend: "auto" (NumPy when installed), "numpy" or "python"
+BM25_BACKEND = "auto"
+
+# analyze_building(): worker pool ("process", "thread" or "serial") and size (None = CPU count)
+BUILDING_POOL = "process"
+BUILDING_MAX_WORKERS = None
+# Start method of that process pool: None = platform default; "fork" shares the
+# preloaded KB copy-on-write but is unsafe in a process that already runs threads
+BUILDING_START_METHOD = None
+
+# analyze_plan_async(): threads running rule evaluation/retrieval off the event loop
+ASYNC_MAX_WORKERS = 4
+
+# Collect process-wide stage timings/counters (see instrumentation.py); off = near-zero cost
+INSTRUMENTATION = False
+
 def kb_ready() -> bool:
     """
     Returns True if the KB JSONL exists (built once).
     Runtime can still work without KB, but evidence retrieval will be skipped.
     """
-    return (KB_DIR / ".built").exists() and KB_ALL_PATH.exists()
+    return KB_BUILT_MARKER.exists() and KB_ALL_PATH.exists()
 
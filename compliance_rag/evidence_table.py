@@ -0,0 +1,126 @@
+# src/evidence_table.py
+"""
+Static evidence table: the evidence hits and rule_sentence of every
+built-in rule, resolved once against the KB at build time
+(`python -m scripts.build_evidence_table`) and stored next to it
+(config.EVIDENCE_TABLE_PATH).
+
+The table is stamped with the version of everything its results depend
+on (KB content, normalizer/sentence versions, top_k, min_score); a table
+built for another version is ignored. Each entry also records the key of
+the evidence query it was resolved for, so a rule whose query changed
+since the build falls back to live retrieval.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import config
+from .normalize import NORMALIZER_VERSION
+from .retrieval import _kb_fingerprint, _query_key, hit_sentence, retrieve_evidence
+from .rules_registry import build_rules
+from .text_picker import SENTENCE_VERSION
+
+TABLE_FORMAT = 1
+TOP_K = 3
+
+
+def _table_version() -> Dict[str, Any]:
+    return {
+        "format": TABLE_FORMAT,
+        "kb": [
+            _kb_fingerprint(str(p))
+            for p in (config.KB_ALL_PATH, config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH)
+        ],
+        "norm_version": NORMALIZER_VERSION,
+        "sent_version": SENTENCE_VERSION,
+        "top_k": TOP_K,
+        "min_score": config.DEFAULT_MIN_SCORE,
+    }
+
+
+def _rule_items() -> Iterator[Dict[str, Any]]:
+    """One finding-shaped item per rule, with the evidence_query rule_engine gives it."""
+    for rule in build_rules():
+        if not rule.evidence_query:
+            continue
+        eq = rule.evidence_query
+        if rule.check == "unit_min_count" and rule.count_types:
+            eq = dict(eq, **{"count_types": rule.count_types})
+        yield {"rule_id": rule.id, "evidence_query": eq}
+
+
+class EvidenceTable:
+    """rule_id -> (query key, evidence hits, rule_sentence)."""
+
+    def __init__(self, rules: Dict[str, Dict[str, Any]]) -> None:
+        self._rules = rules
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def get(self, rule_id: Optional[str], evidence_query: Dict[str, Any]) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """(evidence copy, rule_sentence), or None if the rule/query is not in the table."""
+        entry = self._rules.get(rule_id or "")
+        if entry is None or entry["query_key"] != _query_key(evidence_query):
+            return None
+        return [dict(h) for h in entry["evidence"]], entry["rule_sentence"]
+
+
+def build_evidence_table(path: Union[str, Path, None] = None) -> Dict[str, Any]:
+    """Resolve every rule's evidence against the current KB and write the table."""
+    from .analyze_plan import _evidence_request
+
+    if not config.kb_ready():
+        raise RuntimeError("KB is not built; run the KB build first")
+
+    out_path = Path(path or config.EVIDENCE_TABLE_PATH)
+    rules: Dict[str, Dict[str, Any]] = {}
+    for item in _rule_items():
+        eq, prefer = _evidence_request(item)
+        evidence = retrieve_evidence(eq, top_k=TOP_K)
+        rules[item["rule_id"]] = {
+            "query_key": _query_key(eq),
+            "evidence": evidence,
+            "rule_sentence": hit_sentence(evidence[0], prefer) if evidence else None,
+        }
+
+    table = {"version": _table_version(), "rules": rules}
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(table, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    os.replace(tmp_path, out_path)
+    return {"rules": len(rules), "out_path": str(out_path)}
+
+
+_LOCK = threading.Lock()
+_LOADED: Dict[str, Any] = {"sig": None, "table": None}
+
+
+def current_table() -> Optional[EvidenceTable]:
+    """
+    The evidence table for the current KB, or None if there is none or it
+    was built for another version. Re-read only when the file changes.
+    """
+    path = config.EVIDENCE_TABLE_PATH
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    version = _table_version()
+    sig = (str(path), st.st_mtime_ns, st.st_size, st.st_ino, json.dumps(version, sort_keys=True))
+
+    with _LOCK:
+        if _LOADED["sig"] != sig:
+            table: Optional[EvidenceTable] = None
+            try:
+                data = json.loads(Path(path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+            if isinstance(data, dict) and data.get("version") == version:
+                table = EvidenceTable(data.get("rules") or {})
+            _LOADED["sig"], _LOADED["table"] = sig, table
+        return _LOADED["table"]
@@ -0,0 +1,158 @@
+# src/filters.py
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+
+from .bm25 import BM25Index
+from .normalize import normalize_arabic, tokenize
+
+# Distinct hint strings memoized per KB before the memo is reset.
+_MAX_HINTS = 1024
+
+
+def _first_token(kw: Optional[str]) -> Optional[str]:
+    kw = (kw or "").strip()
+    if not kw:
+        return None
+    toks = tokenize(kw)
+    return toks[0] if toks else None
+
+
+class FilterIndex:
+    """
+    Precompiled hard filters for one KB.
+
+    - keyword filters use the BM25 postings as per-chunk token sets
+    - section/exclude hints match against normalized section and text,
+      normalized once per KB; the matching chunk ids of each hint are memoized
+    - `texts_containing` does the same against the text only (boost keywords)
+
+    `candidates()` returns the chunk ids passing every filter, in corpus order,
+    or None when no filter removed anything (score the whole KB).
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]], index: BM25Index) -> None:
+        self._chunks = chunks
+        self._postings = index.postings
+        self.n_docs = len(chunks)
+        self._section_norm: Optional[List[str]] = None
+        self._text_norm: Optional[List[str]] = None
+        self._hint_docs: Dict[str, FrozenSet[int]] = {}
+        self._text_docs: Dict[str, FrozenSet[int]] = {}
+
+    def _normalized(self) -> None:
+        if self._text_norm is not None:
+            return
+        sections: List[str] = []
+        texts: List[str] = []
+        for ch in self._chunks:
+            sections.append(normalize_arabic(ch.get("section") or ""))
+            texts.append(normalize_arabic(ch.get("text") or ""))
+        self._section_norm = sections
+        self._text_norm = texts
+
+    def text_norm(self, i: int) -> str:
+        """Normalized text of chunk i (cached)."""
+        self._normalized()
+        return self._text_norm[i]  # type: ignore[index]
+
+    def containing(self, hint: Optional[str]) -> FrozenSet[int]:
+        """Chunks whose normalized section or text contains the normalized hint."""
+        needle = normalize_arabic(hint or "")
+        if not needle:
+            return frozenset()
+
+        docs = self._hint_docs.get(needle)
+        if docs is None:
+            self._normalized()
+            sections, texts = self._section_norm, self._text_norm
+            docs = frozenset(
+                i for i in range(self.n_docs)
+                if needle in sections[i] or needle in texts[i]  # type: ignore[index]
+            )
+            if len(self._hint_docs) >= _MAX_HINTS:
+                self._hint_docs.clear()
+            self._hint_docs[needle] = docs
+        return docs
+
+    def texts_containing(self, hint: Optional[str]) -> FrozenSet[int]:
+        """Chunks whose normalized text (section not included) contains the normalized hint."""
+        needle = normalize_arabic(hint or "")
+        if not needle:
+            return frozenset()
+
+        docs = self._text_docs.get(needle)
+        if docs is None:
+            self._normalized()
+            texts = self._text_norm
+            docs = frozenset(i for i in range(self.n_docs) if needle in texts[i])  # type: ignore[index]
+            if len(self._text_docs) >= _MAX_HINTS:
+                self._text_docs.clear()
+            self._text_docs[needle] = docs
+        return docs
+
+    def _token_docs(self, tok: str) -> Iterable[int]:
+        return self._postings.get(tok, {}).keys()
+
+    def all_tokens(self, keywords: List[str]) -> Optional[Set[int]]:
+        """Chunks containing the first token of every keyword (None = no constraint)."""
+        docs: Optional[Set[int]] = None
+        for kw in keywords:
+            tok = _first_token(kw)
+            if tok is None:
+                continue
+            if docs is None:
+                docs = set(self._token_docs(tok))
+            else:
+                docs.intersection_update(self._token_docs(tok))
+        return docs
+
+    def any_tokens(self, keywords: List[str]) -> Set[int]:
+        """Chunks containing the first token of at least one keyword."""
+        docs: Set[int] = set()
+        for kw in keywords:
+            tok = _first_token(kw)
+            if tok is not None:
+                docs.update(self._token_docs(tok))
+        return docs
+
+    def candidates(
+        self,
+        *,
+        section_hint: Optional[str] = None,
+        exclude_hints: Optional[List[str]] = None,
+        must_include_all: Optional[List[str]] = None,
+        must_include_any: Optional[List[str]] = None,
+    ) -> Optional[List[int]]:
+        docs: Optional[Set[int]] = None
+
+        def narrow(subset: Iterable[int]) -> None:
+            nonlocal docs
+            if docs is None:
+                docs = set(subset)
+            else:
+                docs.intersection_update(subset)
+
+        if must_include_all:
+            all_docs = self.all_tokens(must_include_all)
+            if all_docs is not None:
+                narrow(all_docs)
+        if must_include_any:
+            narrow(self.any_tokens(must_include_any))
+        if section_hint:
+            narrow(self.containing(section_hint))
+
+        if docs is None:
+            excluded: Set[int] = set()
+            for h in exclude_hints or []:
+                excluded.update(self.containing(h))
+            if not excluded:
+                return None
+            return [i for i in range(self.n_docs) if i not in excluded]
+
+        for h in exclude_hints or []:
+            if not docs:
+                break
+            docs.difference_update(self.containing(h))
+
+        return sorted(docs)
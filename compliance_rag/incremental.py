@@ -0,0 +1,168 @@
+# src/incremental.py
+"""
+Incremental re-analysis of a revised plan.
+
+    result, handle = analyze_plan_incremental(project_id=p, asset_id=a, rooms=rooms)
+    ...  # the designer edits one room
+    result, handle = analyze_plan_incremental(project_id=p, asset_id=a, rooms=rooms2, previous=handle)
+
+Each room is keyed by a hash of its content (id included). Only rooms
+whose key was not in the previous handle are run through the room rules;
+the others reuse their formatted findings. `__UNIT__` count rules are
+re-run from the new type counts, and evidence is reused per evidence
+query. The result is identical to `analyze_plan(rooms=...)`.
+
+A handle is reused only while the rule registry and KB version are the
+ones it was built with; otherwise everything is recomputed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from .analyze_plan import _attach_evidence, _format_for_reading, _pending_evidence
+from .instrumentation import count, stage
+from .retrieval import _cache_key, _kb_version, retrieve_evidence_batch
+from .rule_engine import RulePlan, _normalize_type, rule_plan
+
+TOP_K = 3
+
+# (formatted violations, formatted warnings, skipped count, normalized room type)
+RoomResult = Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int, str]
+
+
+class PlanHandle:
+    """
+    Opaque state of a previous `analyze_plan_incremental` call: formatted
+    findings per room content hash and evidence per evidence query.
+    """
+
+    __slots__ = ("plan", "kb_version", "kb_ready", "rooms", "evidence")
+
+    def __init__(self, plan: RulePlan, kb_version: Tuple[str, ...], kb_ready: bool) -> None:
+        self.plan = plan
+        self.kb_version = kb_version
+        self.kb_ready = kb_ready
+        self.rooms: Dict[str, RoomResult] = {}
+        self.evidence: Dict[Any, List[Dict[str, Any]]] = {}
+
+
+_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _room_key(room: Dict[str, Any]) -> str:
+    blob = _ENCODER.encode(room)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _with_evidence(handle: PlanHandle, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach evidence to a partial rule result and format it, reusing the handle's evidence."""
+    pending = _pending_evidence(result, handle.kb_ready)
+
+    min_score = config.DEFAULT_MIN_SCORE
+    keys = [_cache_key(eq, TOP_K, min_score) for _, eq, _ in pending]
+    missing = {k: eq for k, (_, eq, _) in zip(keys, pending) if k not in handle.evidence}
+    if missing:
+        with stage("retrieval"):
+            fetched = retrieve_evidence_batch(list(missing.values()), top_k=TOP_K, min_score=min_score)
+        handle.evidence.update(zip(missing, fetched))
+
+    with stage("sentence"):
+        for (item, _, prefer), key in zip(pending, keys):
+            _attach_evidence(item, [dict(h) for h in handle.evidence[key]], prefer)
+
+    return _format_for_reading(result)
+
+
+def _copy_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {**item, "ref": dict(item["ref"])}
+
+
+def analyze_plan_incremental(
+    *,
+    project_id: str,
+    asset_id: str,
+    rooms: Optional[List[Dict[str, Any]]] = None,
+    previous: Optional[PlanHandle] = None,
+) -> Tuple[Dict[str, Any], PlanHandle]:
+    """
+    `analyze_plan` for a revision of a plan analyzed before: pass the
+    handle returned by the previous call as `previous`.
+
+    Returns (result, handle); result is what `analyze_plan` returns for
+    the same rooms.
+    """
+    rooms = rooms or []
+    plan = rule_plan()
+    kb_ready = config.kb_ready()
+    kb_version = _kb_version()
+
+    handle = PlanHandle(plan, kb_version, kb_ready)
+    known: Dict[str, RoomResult] = {}
+    if (
+        previous is not None
+        and previous.plan is plan
+        and previous.kb_version == kb_version
+        and previous.kb_ready == kb_ready
+    ):
+        handle.evidence = previous.evidence
+        known = previous.rooms
+
+    by_type = plan.by_type
+    violations: List[Dict[str, Any]] = []
+    warnings: List[Dict[str, Any]] = []
+    skipped = 0
+    type_counts: Dict[str, int] = {}
+    evaluated = 0
+
+    for room in rooms:
+        key = _room_key(room)
+        res = handle.rooms.get(key) or known.get(key)
+        if res is None:
+            evaluated += 1
+            room_id = room.get("id")
+            rtype = _normalize_type(room.get("type") or "Unknown")
+            v: List[Dict[str, Any]] = []
+            w: List[Dict[str, Any]] = []
+            s: List[Dict[str, Any]] = []
+            with stage("rules"):
+                for check in by_type.get(rtype, ()):
+                    check(room, room_id, rtype, v, w, s)
+            formatted = _with_evidence(handle, {"violations": v, "warnings": w})
+            res = (formatted["violations"], formatted["warnings"], len(s), rtype)
+        handle.rooms[key] = res
+
+        room_violations, room_warnings, n_skipped, rtype = res
+        violations.extend(_copy_item(x) for x in room_violations)
+        warnings.extend(_copy_item(x) for x in room_warnings)
+        skipped += n_skipped
+        type_counts[rtype] = type_counts.get(rtype, 0) + 1
+
+    count("rooms_evaluated", evaluated)
+    count("rooms_reused", len(rooms) - evaluated)
+
+    unit_v: List[Dict[str, Any]] = []
+    unit_w: List[Dict[str, Any]] = []
+    with stage("rules"):
+        for unit_check in plan.unit:
+            unit_check(type_counts, unit_v, unit_w)
+    if unit_v or unit_w:
+        formatted = _with_evidence(handle, {"violations": unit_v, "warnings": unit_w})
+        violations.extend(formatted["violations"])
+        warnings.extend(formatted["warnings"])
+
+    result = {
+        "project_id": project_id,
+        "asset_id": asset_id,
+        "summary": {
+            "rooms_total": len(rooms),
+            "violations_total": len(violations),
+            "warnings_total": len(warnings),
+            "skipped_missing_data": skipped,
+        },
+        "violations": violations,
+        "warnings": warnings,
+    }
+    return result, handle
@@ -0,0 +1,250 @@
+# src/instrumentation.py
+"""
+Lightweight stage timers and counters for the analysis pipeline.
+
+    with stage("bm25"):
+        ...
+    count("chunks_scored", n)
+
+Measurements go to:
+- process-wide metrics (when enabled via `enable()` or config.INSTRUMENTATION),
+  readable with `snapshot()` / `prometheus_text()` and pushed to sinks;
+- the current request's `Trace`, if one is active (`analyze_plan(debug=True)`).
+
+With both off, `stage()` returns a shared no-op context manager and
+`count()` returns immediately.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import config
+
+Event = Dict[str, Any]
+Sink = Callable[[Event], None]
+
+_ENABLED = bool(config.INSTRUMENTATION)
+_SINKS: List[Sink] = []
+_TRACE: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("compliance_rag_trace", default=None)
+
+
+class Trace:
+    """Stage timings and counters collected for one request."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}   # stage -> [calls, seconds]
+        self.counters: Dict[str, int] = {}
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self.stages.setdefault(name, [0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+
+    def add_count(self, name: str, n: int) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+                "stages": {
+                    name: {"calls": int(calls), "ms": round(secs * 1000, 3)}
+                    for name, (calls, secs) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+
+class _Metrics:
+    """Process-wide aggregates: per-stage calls/total/max seconds, counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}   # stage -> [calls, seconds, max seconds]
+        self.counters: Dict[str, int] = {}
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self.stages.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+            if seconds > s[2]:
+                s[2] = seconds
+
+    def add_count(self, name: str, n: int) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stages": {
+                    name: {"calls": int(calls), "seconds": secs, "max_seconds": mx}
+                    for name, (calls, secs, mx) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+
+_METRICS = _Metrics()
+
+
+def _emit(event: Event) -> None:
+    for sink in list(_SINKS):
+        try:
+            sink(event)
+        except Exception:
+            logging.getLogger(__name__).exception("instrumentation sink failed")
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopStage":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("name", "trace", "t0")
+
+    def __init__(self, name: str, trace: Optional[Trace]) -> None:
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self) -> "_Stage":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        dt = time.perf_counter() - self.t0
+        if self.trace is not None:
+            self.trace.add_stage(self.name, dt)
+        if _ENABLED:
+            _METRICS.add_stage(self.name, dt)
+            if _SINKS:
+                _emit({"type": "stage", "stage": self.name, "seconds": dt})
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one pipeline stage."""
+    trace = _TRACE.get()
+    if trace is None and not _ENABLED:
+        return _NOOP
+    return _Stage(name, trace)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a counter (e.g. chunks scanned, cache hits)."""
+    trace = _TRACE.get()
+    if trace is None and not _ENABLED:
+        return
+    if trace is not None:
+        trace.add_count(name, n)
+    if _ENABLED:
+        _METRICS.add_count(name, n)
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Collect a per-request Trace for the code run inside the block."""
+    t = Trace()
+    token = _TRACE.set(t)
+    try:
+        yield t
+    finally:
+        _TRACE.reset(token)
+        if _ENABLED and _SINKS:
+            _emit({"type": "trace", "trace": t.to_dict()})
+
+
+def current_trace() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+def enable() -> None:
+    global _ENABLED
+    _ENABLED = True
+
+
+def disable() -> None:
+    global _ENABLED
+    _ENABLED = False
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def add_sink(sink: Sink) -> Sink:
+    """Register a callback receiving {"type": "stage"|"trace", ...} events."""
+    _SINKS.append(sink)
+    return sink
+
+
+def remove_sink(sink: Sink) -> None:
+    if sink in _SINKS:
+        _SINKS.remove(sink)
+
+
+def logging_sink(logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> Sink:
+    """A sink writing each event to `logger` (default: this module's logger)."""
+    log = logger or logging.getLogger(__name__)
+
+    def sink(event: Event) -> None:
+        if event["type"] == "stage":
+            log.log(level, "stage %s %.3f ms", event["stage"], event["seconds"] * 1000)
+        else:
+            log.log(level, "trace %s", event["trace"])
+
+    return sink
+
+
+def snapshot() -> Dict[str, Any]:
+    """Process-wide stage timings and counters collected so far."""
+    return _METRICS.snapshot()
+
+
+def reset() -> None:
+    _METRICS.reset()
+
+
+def prometheus_text(prefix: str = "compliance_rag") -> str:
+    """Process-wide metrics in the Prometheus text exposition format."""
+    snap = _METRICS.snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for name, s in sorted(snap["stages"].items()):
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["calls"]}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["seconds"]:.9f}')
+    lines.append(f"# HELP {prefix}_stage_seconds_max Slowest single run per pipeline stage.")
+    lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+    for name, s in sorted(snap["stages"].items()):
+        lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {s["max_seconds"]:.9f}')
+    lines.append(f"# HELP {prefix}_events_total Pipeline counters.")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, n in sorted(snap["counters"].items()):
+        lines.append(f'{prefix}_events_total{{name="{name}"}} {n}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,322 @@
+# src/kb_binary.py
+"""
+Compact binary KB format (`*.bin` next to each `*_chunks.jsonl`).
+
+Layout (native byte order, every section 8-byte aligned):
+
+    magic "CRKB" | u16 format version | u16 reserved | u32 header length
+    header JSON  {"n_chunks", "byteorder", "norm_version", "sent_version",
+                  "source": {"size", "sha1"} of the JSONL it was built from,
+                  "sections": {name: [offset, length, typecode]}}
+                 (offsets relative to the data area that follows the header)
+    str_data     all distinct strings, utf-8, back to back
+    str_offsets  u64[n_strings + 1] into str_data
+    doc/source/section/text   u32[n_chunks] string ids (NONE_ID for null)
+    page/chunk_id             i32[n_chunks] (NONE_INT for null)
+    vocab        u32[n_vocab] string id of each token id
+    tok_offsets  u64[n_chunks + 1] into tok_ids
+    tok_ids      u32[...] pre-tokenized chunk text
+    tok_starts   u32[...] raw-text start offset of each token (parallel to tok_ids)
+    sent_offsets u64[n_chunks + 1] into sent_spans (in sentences)
+    sent_spans   u32[3 * ...] (start, end, has_obligation) of each sentence
+
+The runtime opens the file with a single read-only mmap and reads columns
+through memoryviews, so forked workers share the pages. Files whose
+`norm_version` differs from `normalize.NORMALIZER_VERSION` are refused;
+sentence spans with a stale `sent_version` are ignored (recomputed from text).
+The runtime only prefers a binary over its JSONL while the JSONL still
+matches the recorded `source` signature.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .normalize import NORMALIZER_VERSION, chunk_tokens_and_starts
+from .text_picker import SENTENCE_VERSION, chunk_sentences
+
+MAGIC = b"CRKB"
+FORMAT_VERSION = 3
+NONE_INT = -(2 ** 31)
+NONE_ID = 2 ** 32 - 1
+
+_PREFIX = struct.Struct("<4sHHI")
+
+_STR_COLUMNS = ("doc_id", "source", "section", "text")
+_INT_COLUMNS = ("page", "chunk_id")
+
+
+class KBFormatError(ValueError):
+    """Raised when a binary KB is missing, corrupt or built for another format."""
+
+
+def binary_path_for(jsonl_path: Union[str, Path]) -> Path:
+    return Path(jsonl_path).with_suffix(".bin")
+
+
+def source_signature(path: Union[str, Path]) -> Dict[str, Any]:
+    """{"size", "sha1"} of a file, as recorded in the binary header."""
+    h = hashlib.sha1()
+    size = 0
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+            size += len(block)
+    return {"size": size, "sha1": h.hexdigest()}
+
+
+def read_kb_header(path: Union[str, Path]) -> Dict[str, Any]:
+    """The JSON header of a binary KB, without mapping the data area."""
+    path = Path(path)
+    try:
+        with path.open("rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                raise KBFormatError(f"{path}: truncated header")
+            magic, version, _, header_len = _PREFIX.unpack(prefix)
+            raw = f.read(header_len)
+    except OSError as e:
+        raise KBFormatError(f"cannot read {path}: {e}") from e
+    if magic != MAGIC:
+        raise KBFormatError(f"{path}: not a binary KB")
+    if version != FORMAT_VERSION:
+        raise KBFormatError(f"{path}: format v{version}, expected v{FORMAT_VERSION}")
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except ValueError as e:
+        raise KBFormatError(f"{path}: corrupt header: {e}") from e
+
+
+def _pad(n: int) -> int:
+    return (-n) % 8
+
+
+def write_kb_binary(
+    chunks: Iterable[Dict[str, Any]],
+    out_path: Union[str, Path],
+    *,
+    source: Optional[Union[str, Path]] = None,
+) -> Dict[str, Any]:
+    """
+    Compile chunk dicts (JSONL rows) into the binary KB format.
+
+    `source` is the JSONL the chunks come from; its signature is taken once
+    `chunks` is exhausted, so a streaming caller must have closed (and moved
+    into place) the JSONL by the time its chunk iterator ends.
+    """
+    out_path = Path(out_path)
+
+    strings: Dict[str, int] = {}
+
+    def sid(s: Optional[str]) -> int:
+        if s is None:
+            return NONE_ID
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    vocab: Dict[str, int] = {}
+    str_cols: Dict[str, array] = {name: array("I") for name in _STR_COLUMNS}
+    int_cols: Dict[str, array] = {name: array("i") for name in _INT_COLUMNS}
+    tok_offsets = array("Q", [0])
+    tok_ids = array("I")
+    tok_starts = array("I")
+    sent_offsets = array("Q", [0])
+    sent_spans = array("I")
+
+    for ch in chunks:
+        for name in _STR_COLUMNS:
+            str_cols[name].append(sid(ch.get(name)))
+        for name in _INT_COLUMNS:
+            v = ch.get(name)
+            int_cols[name].append(NONE_INT if v is None else int(v))
+
+        toks, starts = chunk_tokens_and_starts(ch)
+        for tok in toks:
+            t = vocab.get(tok)
+            if t is None:
+                t = vocab[tok] = len(vocab)
+            tok_ids.append(t)
+        tok_starts.extend(starts)
+        tok_offsets.append(len(tok_ids))
+
+        for start, end, obligation in chunk_sentences(ch):
+            sent_spans.extend((start, end, int(obligation)))
+        sent_offsets.append(len(sent_spans) // 3)
+
+    vocab_col = array("I", (sid(tok) for tok in vocab))
+
+    str_offsets = array("Q", [0])
+    str_data = bytearray()
+    for s in strings:
+        str_data += s.encode("utf-8")
+        str_offsets.append(len(str_data))
+
+    n_chunks = len(tok_offsets) - 1
+    payload: List[Tuple[str, str, bytes]] = [
+        ("str_data", "B", bytes(str_data)),
+        ("str_offsets", "Q", str_offsets.tobytes()),
+    ]
+    payload += [(name, "I", str_cols[name].tobytes()) for name in _STR_COLUMNS]
+    payload += [(name, "i", int_cols[name].tobytes()) for name in _INT_COLUMNS]
+    payload += [
+        ("vocab", "I", vocab_col.tobytes()),
+        ("tok_offsets", "Q", tok_offsets.tobytes()),
+        ("tok_ids", "I", tok_ids.tobytes()),
+        ("tok_starts", "I", tok_starts.tobytes()),
+        ("sent_offsets", "Q", sent_offsets.tobytes()),
+        ("sent_spans", "I", sent_spans.tobytes()),
+    ]
+
+    # Section offsets are relative to the (8-aligned) start of the data area.
+    sections: Dict[str, List[Any]] = {}
+    pos = 0
+    for name, code, data in payload:
+        sections[name] = [pos, len(data), code]
+        pos += len(data) + _pad(len(data))
+
+    header_fields: Dict[str, Any] = {
+        "n_chunks": n_chunks,
+        "byteorder": sys.byteorder,
+        "norm_version": NORMALIZER_VERSION,
+        "sent_version": SENTENCE_VERSION,
+        "sections": sections,
+    }
+    if source is not None:
+        header_fields["source"] = source_signature(source)
+    header = json.dumps(header_fields, sort_keys=True).encode("utf-8")
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+        f.write(header)
+        f.write(b"\0" * _pad(f.tell()))
+        for _, _, data in payload:
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(tmp_path, out_path)
+
+    return {"chunks": n_chunks, "vocab": len(vocab), "out_path": str(out_path)}
+
+
+class KBBinary:
+    """
+    Read-only, mmap-backed view of a binary KB.
+
+    Indexing returns a chunk dict with the same keys as a JSONL row
+    (minus the unused `text_norm`); strings are decoded on access.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        try:
+            with self.path.open("rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise KBFormatError(f"cannot map {self.path}: {e}") from e
+
+        if len(self._mm) < _PREFIX.size:
+            raise KBFormatError(f"{self.path}: truncated header")
+
+        magic, version, _, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise KBFormatError(f"{self.path}: not a binary KB")
+        if version != FORMAT_VERSION:
+            raise KBFormatError(f"{self.path}: format v{version}, expected v{FORMAT_VERSION}")
+
+        self.header: Dict[str, Any] = json.loads(
+            self._mm[_PREFIX.size:_PREFIX.size + header_len].decode("utf-8")
+        )
+        if self.header.get("byteorder") != sys.byteorder:
+            raise KBFormatError(f"{self.path}: built on a {self.header.get('byteorder')}-endian host")
+        if self.header.get("norm_version") != NORMALIZER_VERSION:
+            raise KBFormatError(
+                f"{self.path}: stale KB (normalizer v{self.header.get('norm_version')}, "
+                f"runtime v{NORMALIZER_VERSION}); rebuild it"
+            )
+
+        data_start = _PREFIX.size + header_len
+        data_start += _pad(data_start)
+
+        buf = memoryview(self._mm)
+        self._cols: Dict[str, memoryview] = {}
+        for name, (offset, length, code) in self.header["sections"].items():
+            offset += data_start
+            if offset + length > len(self._mm):
+                raise KBFormatError(f"{self.path}: section {name} out of bounds")
+            self._cols[name] = buf[offset:offset + length].cast(code)
+
+        self.n_chunks: int = int(self.header["n_chunks"])
+        self._str_data = self._cols["str_data"]
+        self._str_offsets = self._cols["str_offsets"]
+        self._vocab: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return self.n_chunks
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == NONE_ID:
+            return None
+        a = self._str_offsets[string_id]
+        b = self._str_offsets[string_id + 1]
+        return str(self._str_data[a:b], "utf-8")
+
+    def _int(self, column: str, i: int) -> Optional[int]:
+        v = self._cols[column][i]
+        return None if v == NONE_INT else v
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if not -self.n_chunks <= i < self.n_chunks:
+            raise IndexError(i)
+        i %= self.n_chunks
+        return {
+            "doc_id": self.string(self._cols["doc_id"][i]),
+            "source": self.string(self._cols["source"][i]),
+            "chunk_id": self._int("chunk_id", i),
+            "page": self._int("page", i),
+            "section": self.string(self._cols["section"][i]),
+            "text": self.string(self._cols["text"][i]),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.n_chunks):
+            yield self[i]
+
+    @property
+    def vocab(self) -> List[str]:
+        if self._vocab is None:
+            self._vocab = [self.string(s) for s in self._cols["vocab"]]
+        return self._vocab
+
+    def tokens(self, i: int) -> List[str]:
+        """Pre-tokenized text of chunk i."""
+        vocab = self.vocab
+        offsets = self._cols["tok_offsets"]
+        ids = self._cols["tok_ids"][offsets[i]:offsets[i + 1]]
+        return [vocab[t] for t in ids]
+
+    def token_starts(self, i: int) -> List[int]:
+        """Raw-text start offset of each token of chunk i."""
+        offsets = self._cols["tok_offsets"]
+        return self._cols["tok_starts"][offsets[i]:offsets[i + 1]].tolist()
+
+    def sentences(self, i: int) -> Optional[List[Tuple[int, int, bool]]]:
+        """Build-time sentence spans of chunk i (None if built by another splitter version)."""
+        if self.header.get("sent_version") != SENTENCE_VERSION:
+            return None
+        offsets = self._cols["sent_offsets"]
+        flat = self._cols["sent_spans"][3 * offsets[i]:3 * offsets[i + 1]].tolist()
+        return [(flat[j], flat[j + 1], bool(flat[j + 2])) for j in range(0, len(flat), 3)]
+
+    def iter_tokens(self) -> Iterator[List[str]]:
+        for i in range(self.n_chunks):
+            yield self.tokens(i)
@@ -0,0 +1,157 @@
+# src/normalize.py
+"""
+Canonical Arabic/Latin search normalizer, shared by the KB builder and runtime.
+
+Bump NORMALIZER_VERSION whenever the output of `normalize_arabic` or `tokenize`
+changes: KBs built with another version carry stale tokens and are refused.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+NORMALIZER_VERSION = 1
+
+AR_NUM_MAP = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+# Everything normalize_arabic does after lowercasing, as one translate table:
+# Arabic digits, letter variants, and diacritics/tatweel (deleted)
+_NORM_TABLE = {
+    **AR_NUM_MAP,
+    **str.maketrans({"إ": "ا", "أ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ؤ": "و", "ئ": "ي", "ة": "ه"}),
+    **str.maketrans("", "", "ًٌٍَُِّْـ"),
+}
+
+# The same mapping as (char, replacement) steps. On non-Latin-1 strings
+# str.translate does a dict lookup per character, while a `str.replace` per
+# mapped character that is actually present is several times faster. No
+# replacement produces a character another step would rewrite, so
+# applying the steps one after another gives the same result as one
+# translate.
+_NORM_STEPS = tuple(
+    (chr(k), v if isinstance(v, str) else ("" if v is None else chr(v)))
+    for k, v in _NORM_TABLE.items()
+)
+
+_NORM_CHAR: Dict[str, str] = dict(_NORM_STEPS)
+
+_TOKEN_RE = re.compile(r"[a-z0-9\u0600-\u06ff]+")
+
+# Strings up to this length (hints, keywords, queries) are memoized.
+_SHORT_TEXT = 64
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Search normalization:
+    - Arabic digits -> Latin digits
+    - lowercase
+    - collapse spaces
+    - unify Arabic letter variants
+    - remove diacritics/tatweel
+
+    Whitespace is collapsed before diacritics are removed, so a lone
+    diacritic between two spaces leaves both spaces.
+    """
+    if not text:
+        return ""
+    if len(text) <= _SHORT_TEXT:
+        return _normalize_short(text)
+    return _normalize(text)
+
+
+def _normalize(text: str) -> str:
+    text = " ".join(text.split()).lower()
+    if text.isascii():
+        return text
+    for ch, repl in _NORM_STEPS:
+        if ch in text:
+            text = text.replace(ch, repl)
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _normalize_short(text: str) -> str:
+    return _normalize(text)
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    if len(text) <= _SHORT_TEXT:
+        return list(_tokenize_short(text))
+    return _TOKEN_RE.findall(normalize_arabic(text))
+
+
+@lru_cache(maxsize=4096)
+def _tokenize_short(text: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN_RE.findall(normalize_arabic(text)))
+
+
+def tokenize_with_offsets(text: str) -> Tuple[List[str], List[int]]:
+    """
+    `tokenize(text)` plus, for each token, the index in `text` (the raw,
+    unnormalized string) where it starts.
+    """
+    if not text:
+        return [], []
+
+    # normalize char by char, remembering the raw index of each output char
+    # (same steps as normalize_arabic: collapse/strip whitespace, lowercase,
+    # then map/delete)
+    chars: List[str] = []
+    pos: List[int] = []
+    started = False
+    space_at = -1
+    for i, c in enumerate(text):
+        if c.isspace():
+            if started and space_at < 0:
+                space_at = i
+            continue
+        started = True
+        if space_at >= 0:
+            chars.append(" ")
+            pos.append(space_at)
+            space_at = -1
+        for lc in c.lower():
+            lc = _NORM_CHAR.get(lc, lc)
+            if lc:
+                chars.append(lc)
+                pos.append(i)
+
+    norm = "".join(chars)
+    tokens: List[str] = []
+    starts: List[int] = []
+    for m in _TOKEN_RE.finditer(norm):
+        tokens.append(m.group())
+        starts.append(pos[m.start()])
+    return tokens, starts
+
+
+def chunk_tokens(chunk: Dict[str, Any]) -> List[str]:
+    """
+    Tokens of a KB chunk: the build-time `tokens` when they were produced by
+    this normalizer version, otherwise re-tokenized from `text`.
+    """
+    toks = chunk.get("tokens")
+    if toks is not None and chunk.get("norm_version") == NORMALIZER_VERSION:
+        return list(toks)
+    return tokenize(chunk.get("text") or "")
+
+
+def chunk_tokens_and_starts(chunk: Dict[str, Any]) -> Tuple[List[str], List[int]]:
+    """
+    (tokens, raw start offset of each token) of a KB chunk, from the
+    build-time `tokens`/`token_starts` when current, else from `text`.
+    """
+    toks = chunk.get("tokens")
+    starts = chunk.get("token_starts")
+    if (
+        toks is not None
+        and starts is not None
+        and len(starts) == len(toks)
+        and chunk.get("norm_version") == NORMALIZER_VERSION
+    ):
+        return list(toks), list(starts)
+    return tokenize_with_offsets(chunk.get("text") or "")
@@ -0,0 +1,66 @@
+# src/preload.py
+"""
+Warm-up for pre-fork servers (gunicorn `preload_app`, uWSGI, multiprocessing):
+
+    import compliance_rag
+    compliance_rag.warmup()   # in the master, before workers are forked
+
+Everything the first request would otherwise build lazily is built once in
+the parent, and forked workers share it copy-on-write.
+"""
+from __future__ import annotations
+
+import gc
+import time
+from typing import Any, Dict
+
+from . import config
+from .analyze_plan import _evidence_request
+from .evidence_table import _rule_items, current_table
+from .retrieval import (
+    _kb_source,
+    _load_quotes,
+    _load_sentences,
+    _resolve_kb_file,
+    preload_kb,
+    retrieve_evidence_batch,
+)
+from .rule_engine import rule_plan
+
+
+def warmup(*, freeze: bool = True) -> Dict[str, Any]:
+    """
+    Compile the rule plan and load every KB file (chunks, BM25 index,
+    filter index, quote offsets, sentence lookup) plus the evidence table,
+    then run the built-in rules' evidence queries once (filling the hint
+    memos and the evidence cache).
+
+    freeze=True then runs `gc.freeze()`: the loaded objects move to the
+    permanent generation, so garbage collections in the workers do not
+    touch (and copy) their pages.
+
+    Returns {"kb_ready", "evidence_table", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    rule_plan()
+
+    kb_ready = config.kb_ready()
+    table = None
+    if kb_ready:
+        preload_kb()
+        for p in (config.KB_ALL_PATH, config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH):
+            kb_file, version, _ = _kb_source(_resolve_kb_file(str(p)))
+            _load_quotes(kb_file, version)
+            _load_sentences(kb_file, version).position(None, None)  # builds the (doc_id, chunk_id) map
+        table = current_table()
+        retrieve_evidence_batch([_evidence_request(item)[0] for item in _rule_items()], top_k=3)
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    return {
+        "kb_ready": kb_ready,
+        "evidence_table": table is not None,
+        "seconds": time.perf_counter() - t0,
+    }
@@ -0,0 +1,163 @@
+# src/records.py
+"""
+Compact in-memory chunk records for JSONL KBs.
+
+A `ChunkRecord` holds only what the runtime reads (no `text_norm`), with
+the repeated doc_id / source / section strings interned. Current build-time
+tokens are kept as `array('I')` ids into a vocabulary shared by the file,
+with their raw start offsets, so the index and quotes never re-tokenize.
+It answers `.get(key)` like the JSONL row dict it replaces.
+"""
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .normalize import NORMALIZER_VERSION
+from .text_picker import SENTENCE_VERSION
+
+
+def _intern(s: Any) -> Any:
+    return sys.intern(s) if isinstance(s, str) else s
+
+
+class Vocab:
+    """Token <-> id table shared by the records of one KB file."""
+
+    __slots__ = ("ids", "tokens")
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.tokens: List[str] = []
+
+    def encode(self, toks: List[str]) -> array:
+        ids, tokens = self.ids, self.tokens
+        out = array("I")
+        for tok in toks:
+            t = ids.get(tok)
+            if t is None:
+                t = ids[tok] = len(tokens)
+                tokens.append(tok)
+            out.append(t)
+        return out
+
+
+class ChunkRecord:
+    __slots__ = (
+        "doc_id", "source", "chunk_id", "page", "section", "text", "sentences", "sent_version",
+        "_vocab", "_tok_ids", "_tok_starts",
+    )
+
+    _KEYS = frozenset((
+        "doc_id", "source", "chunk_id", "page", "section", "text", "sentences", "sent_version",
+        "tokens", "token_starts", "norm_version",
+    ))
+
+    def __init__(
+        self,
+        doc_id: Optional[str],
+        source: Optional[str],
+        chunk_id: Optional[int],
+        page: Optional[int],
+        section: Optional[str],
+        text: Optional[str],
+        sentences: Optional[Tuple[Tuple[int, int, bool], ...]] = None,
+        vocab: Optional[Vocab] = None,
+        tok_ids: Optional[array] = None,
+        tok_starts: Optional[array] = None,
+    ) -> None:
+        self.doc_id = _intern(doc_id)
+        self.source = _intern(source)
+        self.chunk_id = chunk_id
+        self.page = page
+        self.section = _intern(section)
+        self.text = text
+        self.sentences = sentences
+        self.sent_version = SENTENCE_VERSION if sentences is not None else None
+        self._vocab = vocab
+        self._tok_ids = tok_ids
+        self._tok_starts = tok_starts
+
+    @property
+    def tokens(self) -> Optional[List[str]]:
+        """Build-time tokens (None if the row had none for this normalizer)."""
+        if self._tok_ids is None:
+            return None
+        vocab = self._vocab.tokens
+        return [vocab[t] for t in self._tok_ids]
+
+    @property
+    def token_starts(self) -> Optional[List[int]]:
+        return None if self._tok_starts is None else self._tok_starts.tolist()
+
+    @property
+    def norm_version(self) -> Optional[int]:
+        return NORMALIZER_VERSION if self._tok_ids is not None else None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], vocab: Optional[Vocab] = None) -> "ChunkRecord":
+        """
+        From a JSONL row; build-time sentence spans and tokens (with their
+        start offsets) are kept only if current, tokens only given a `vocab`.
+        """
+        sentences = None
+        stored = row.get("sentences")
+        if stored is not None and row.get("sent_version") == SENTENCE_VERSION:
+            sentences = tuple((int(a), int(b), bool(o)) for a, b, o in stored)
+        tok_ids = tok_starts = None
+        toks = row.get("tokens")
+        if vocab is not None and toks is not None and row.get("norm_version") == NORMALIZER_VERSION:
+            tok_ids = vocab.encode(toks)
+            starts = row.get("token_starts")
+            if starts is not None and len(starts) == len(toks):
+                tok_starts = array("I", starts)
+        return cls(
+            row.get("doc_id"),
+            row.get("source"),
+            row.get("chunk_id"),
+            row.get("page"),
+            row.get("section"),
+            row.get("text"),
+            sentences,
+            vocab if tok_ids is not None else None,
+            tok_ids,
+            tok_starts,
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._KEYS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(doc_id={self.doc_id!r}, chunk_id={self.chunk_id!r})"
+
+
+_CHUNK_FIELDS = ("doc_id", "chunk_id", "text", "section", "source", "page")
+
+
+def same_chunk(a: Any, b: Any) -> bool:
+    """True if two chunks (JSONL rows, records or binary KB rows) carry the same data."""
+    return all(a.get(k) == b.get(k) for k in _CHUNK_FIELDS)
+
+
+def iter_jsonl_rows(p: Path) -> Iterator[Dict[str, Any]]:
+    with open(p, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_records(p: Path) -> List[ChunkRecord]:
+    """A JSONL KB file as ChunkRecords ([] if missing)."""
+    if not p.exists():
+        return []
+    vocab = Vocab()
+    return [ChunkRecord.from_row(row, vocab) for row in iter_jsonl_rows(p)]
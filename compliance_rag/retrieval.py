@@ -1,57 +1,306 @@
 # src/retrieval.py
 from __future__ import annotations
 
+import functools
+import hashlib
+import heapq
 import json
 import math
-import re
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from . import config
+from .bm25 import BM25Index
+from .filters import FilterIndex
+from .instrumentation import count, stage
+from .kb_binary import KBBinary, KBFormatError, binary_path_for, read_kb_header
+from .records import iter_jsonl_rows, load_records, same_chunk
+from .normalize import chunk_tokens, chunk_tokens_and_starts, normalize_arabic, tokenize, tokenize_with_offsets
+from .text_picker import Span, best_sentence, chunk_sentences, pick_best_sentence
 
-AR_NUM_MAP = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+_MAX_KB_FILES = 16
 
 
-def normalize_arabic(text: str) -> str:
+def _latest_version(fn):
     """
-    Search normalization:
-    - Arabic digits -> Latin digits
-    - lowercase
-    - collapse spaces
-    - unify Arabic letter variants
-    - remove diacritics/tatweel
+    Memoize `fn(kb_path, *version)`, keeping only the newest version of each
+    KB file: loading a new version (or the file's other format) drops the
+    entry it replaces. At most _MAX_KB_FILES files are kept, least recently
+    loaded evicted.
     """
-    text = (text or "").translate(AR_NUM_MAP)
-    text = re.sub(r"\s+", " ", text).strip().lower()
-    text = re.sub("[إأآٱ]", "ا", text)
-    text = re.sub("ى", "ي", text)
-    text = re.sub("ؤ", "و", text)
-    text = re.sub("ئ", "ي", text)
-    text = re.sub("ة", "ه", text)
-    text = re.sub("[ًٌٍَُِّْـ]", "", text)
-    return text
+    cache: "OrderedDict[str, Tuple[Tuple[str, Tuple[Any, ...]], Any]]" = OrderedDict()
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(kb_path: str, *version: Any) -> Any:
+        # a KB's .jsonl and .bin share one slot: switching between them evicts too
+        slot = os.path.splitext(kb_path)[0]
+        key = (kb_path, version)
+        entry = cache.get(slot)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        value = fn(kb_path, *version)
+        with lock:
+            cache[slot] = (key, value)
+            cache.move_to_end(slot)
+            while len(cache) > _MAX_KB_FILES:
+                cache.popitem(last=False)
+        return value
+
+    wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+    return wrapper
+
+
+@lru_cache(maxsize=64)
+def _content_hash(path: str, mtime_ns: int, size: int, inode: int) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _kb_fingerprint(path: str) -> str:
+    """
+    Content hash of a KB file ("" if missing).
+    The file is only re-hashed when its stat signature (mtime/size/inode) changes.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return _content_hash(path, st.st_mtime_ns, st.st_size, st.st_ino)
 
 
-def tokenize(text: str) -> List[str]:
-    t = normalize_arabic(text)
-    return re.findall(r"[a-z0-9\u0600-\u06ff]+", t)
+@lru_cache(maxsize=64)
+def _binary_source(path: str, mtime_ns: int, size: int, inode: int) -> Optional[Dict[str, Any]]:
+    """The JSONL signature recorded in a binary KB header (None if unreadable/absent)."""
+    try:
+        return read_kb_header(path).get("source")
+    except KBFormatError:
+        return None
 
 
-@lru_cache(maxsize=16)
-def _load_chunks(jsonl_path: str) -> List[Dict[str, Any]]:
-    p = Path(jsonl_path)
-    if not p.exists():
-        return []
+def _resolve_kb_file(jsonl_path: str) -> str:
+    """
+    Prefer the compiled binary KB while its JSONL is still the one it was
+    built from (size + content hash recorded in the binary header).
+    Binaries without a recorded source fall back to comparing mtimes.
+    """
+    bin_path = binary_path_for(jsonl_path)
+    try:
+        bin_st = os.stat(bin_path)
+    except OSError:
+        return jsonl_path
+    try:
+        jsonl_st = os.stat(jsonl_path)
+    except OSError:
+        return str(bin_path)
+    src = _binary_source(str(bin_path), bin_st.st_mtime_ns, bin_st.st_size, bin_st.st_ino)
+    if src is None:
+        return str(bin_path) if bin_st.st_mtime_ns >= jsonl_st.st_mtime_ns else jsonl_path
+    if src.get("size") != jsonl_st.st_size:
+        return jsonl_path
+    return str(bin_path) if src.get("sha1") == _kb_fingerprint(jsonl_path) else jsonl_path
+
+
+@_latest_version
+def _load_chunks(kb_path: str, version: str = "") -> Sequence[Any]:
+    """
+    Load a KB file (binary via mmap, or JSONL as compact ChunkRecords);
+    `version` (its fingerprint) only keys the cache.
+    """
+    p = Path(kb_path)
+    with stage("kb_load"):
+        if p.suffix == ".bin":
+            try:
+                return KBBinary(p)
+            except KBFormatError:
+                return load_records(p.with_suffix(".jsonl"))
+        return load_records(p)
+
+
+def _iter_kb_rows(p: Path) -> Iterator[Dict[str, Any]]:
+    """Stream a KB file's chunk rows without keeping them."""
+    if p.suffix == ".bin":
+        try:
+            kb = KBBinary(p)
+        except KBFormatError:
+            p = p.with_suffix(".jsonl")
+        else:
+            yield from kb
+            return
+    if p.exists():
+        yield from iter_jsonl_rows(p)
+
+
+@_latest_version
+def _doc_range(kb_path: str, version: str, corpus_path: str, corpus_version: str) -> Optional[Tuple[int, int]]:
+    """
+    (lo, hi) if the chunks of `kb_path` are exactly corpus[lo:hi] (the per-doc
+    files are segments of kb_all), else None.
+    """
+    corpus = _load_chunks(corpus_path, corpus_version)
+    lo = n = 0
+    for n, row in enumerate(_iter_kb_rows(Path(kb_path)), start=1):
+        if n == 1:
+            lo = next((i for i, ch in enumerate(corpus) if same_chunk(ch, row)), -1)
+            if lo < 0:
+                return None
+        i = lo + n - 1
+        if i >= len(corpus) or not same_chunk(corpus[i], row):
+            return None
+    return (lo, lo + n) if n else None
+
+
+def _kb_source(kb_file: str) -> Tuple[str, str, Optional[Tuple[int, int]]]:
+    """
+    (file, version, chunk range) serving `kb_file`: a per-doc file that is a
+    segment of kb_all is served by kb_all's chunks, index and filters
+    restricted to its range, so every chunk is held (and indexed) only once.
+    """
+    version = _kb_fingerprint(kb_file)
+    corpus_file = _resolve_kb_file(str(config.KB_ALL_PATH))
+    if kb_file != corpus_file:
+        corpus_version = _kb_fingerprint(corpus_file)
+        doc_range = _doc_range(kb_file, version, corpus_file, corpus_version)
+        if doc_range is not None:
+            return corpus_file, corpus_version, doc_range
+    return kb_file, version, None
+
+
+@_latest_version
+def _load_index(kb_path: str, version: str = "") -> BM25Index:
+    """Build the BM25 index for a KB file once; reused by every query."""
+    chunks = _load_chunks(kb_path, version)
+    with stage("index_build"):
+        if isinstance(chunks, KBBinary):
+            return BM25Index(chunks.iter_tokens(), backend=config.BM25_BACKEND)
+        return BM25Index((chunk_tokens(ch) for ch in chunks), backend=config.BM25_BACKEND)
 
-    rows: List[Dict[str, Any]] = []
-    with open(p, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
+
+@_latest_version
+def _load_filters(kb_path: str, version: str = "") -> FilterIndex:
+    """Compiled hard filters (token sets + normalized section/text) for a KB file."""
+    return FilterIndex(_load_chunks(kb_path, version), _load_index(kb_path, version))
+
+
+class _QuoteOffsets:
+    """
+    Per chunk, the raw-text offset of the first occurrence of each token,
+    from the build-time token offsets. Built per chunk on first use (only
+    chunks that make it into a result are ever quoted).
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]]) -> None:
+        self._chunks = chunks
+        self._first: Dict[int, Dict[str, int]] = {}
+
+    def first(self, i: int) -> Dict[str, int]:
+        first = self._first.get(i)
+        if first is None:
+            chunks = self._chunks
+            if isinstance(chunks, KBBinary):
+                toks, starts = chunks.tokens(i), chunks.token_starts(i)
+            else:
+                toks, starts = chunk_tokens_and_starts(chunks[i])
+            first = _first_offsets(toks, starts)
+            self._first[i] = first
+        return first
+
+
+def _first_offsets(toks: List[str], starts: List[int]) -> Dict[str, int]:
+    first: Dict[str, int] = {}
+    for tok, start in zip(toks, starts):
+        if tok not in first:
+            first[tok] = start
+    return first
+
+
+@_latest_version
+def _load_quotes(kb_path: str, version: str = "") -> _QuoteOffsets:
+    return _QuoteOffsets(_load_chunks(kb_path, version))
+
+
+_MAX_SENTENCE_MEMO = 4096
+
+
+class _SentenceIndex:
+    """
+    Requirement-sentence lookup over one KB file by (doc_id, chunk_id),
+    scoring the build-time sentence spans of the chunk's whole text. The
+    best sentence per (chunk, prefer keywords) is memoized.
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]]) -> None:
+        self._chunks = chunks
+        self._pos: Optional[Dict[Tuple[Any, Any], int]] = None
+        self._spans: Dict[int, Tuple[str, List[Span]]] = {}
+        self._best: Dict[Tuple[int, Tuple[str, ...]], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def position(self, doc_id: Any, chunk_id: Any) -> Optional[int]:
+        if self._pos is None:
+            with self._lock:
+                if self._pos is None:
+                    pos: Dict[Tuple[Any, Any], int] = {}
+                    for i, ch in enumerate(self._chunks):
+                        pos.setdefault((ch.get("doc_id"), ch.get("chunk_id")), i)
+                    self._pos = pos
+        return self._pos.get((doc_id, chunk_id))
+
+    def _sentences(self, i: int) -> Tuple[str, List[Span]]:
+        entry = self._spans.get(i)
+        if entry is None:
+            chunks = self._chunks
+            ch = chunks[i]
+            spans = chunks.sentences(i) if isinstance(chunks, KBBinary) else None
+            entry = (ch.get("text") or "", spans if spans is not None else chunk_sentences(ch))
+            self._spans[i] = entry
+        return entry
+
+    def best(self, i: int, prefer: Sequence[str]) -> Optional[str]:
+        key = (i, tuple(prefer))
+        try:
+            return self._best[key]
+        except KeyError:
+            pass
+        text, spans = self._sentences(i)
+        sentence = best_sentence(text, spans, key[1])
+        if len(self._best) >= _MAX_SENTENCE_MEMO:
+            self._best.clear()
+        self._best[key] = sentence
+        return sentence
+
+
+@_latest_version
+def _load_sentences(kb_path: str, version: str = "") -> _SentenceIndex:
+    return _SentenceIndex(_load_chunks(kb_path, version))
+
+
+def hit_sentence(hit: Dict[str, Any], prefer: Sequence[str]) -> Optional[str]:
+    """
+    The requirement sentence of an evidence hit's chunk (see
+    `text_picker.best_sentence`), looked up in the KB it came from.
+    Falls back to picking from the hit's quote if the chunk is not found.
+    """
+    doc, chunk_id = hit.get("doc"), hit.get("chunk_id")
+    if config.kb_ready():
+        paths = _chunks_paths_by_doc(doc)
+        if config.KB_ALL_PATH not in paths:
+            paths.append(config.KB_ALL_PATH)
+        for p in paths:
+            kb_file, version, _ = _kb_source(_resolve_kb_file(str(p)))
+            index = _load_sentences(kb_file, version)
+            i = index.position(doc, chunk_id)
+            if i is not None:
+                return index.best(i, prefer)
+    return pick_best_sentence(hit.get("quote", ""), list(prefer))
 
 
 def _bm25_rank(
@@ -60,7 +309,10 @@ def _bm25_rank(
     k1: float = 1.5,
     b: float = 0.75,
 ) -> List[float]:
-    """Lightweight BM25 over token lists (no external deps)."""
+    """
+    Lightweight BM25 over token lists (no external deps).
+    Reference full-scan scorer; runtime queries go through `BM25Index`.
+    """
     N = len(docs_tokens)
     if N == 0:
         return []
@@ -133,57 +385,7 @@ def build_query(evidence_query: Dict[str, Any]) -> str:
     return " ".join(parts).strip()
 
 
-def _hard_filter_all_tokens(text: str, must_include_all: List[str]) -> bool:
-    if not must_include_all:
-        return True
-
-    tokens = set(tokenize(text))
-    for kw in must_include_all:
-        kw = (kw or "").strip()
-        if not kw:
-            continue
-        kw_toks = tokenize(kw)
-        if not kw_toks:
-            continue
-        if kw_toks[0] not in tokens:
-            return False
-    return True
-
-
-def _hard_filter_any_tokens(text: str, must_include_any: List[str]) -> bool:
-    if not must_include_any:
-        return True
-
-    tokens = set(tokenize(text))
-    for kw in must_include_any:
-        kw = (kw or "").strip()
-        if not kw:
-            continue
-        kw_toks = tokenize(kw)
-        if not kw_toks:
-            continue
-        if kw_toks[0] in tokens:
-            return True
-    return False
-
-
-def _slice_quote(text: str, query_tokens: List[str], max_chars: int = 700) -> str:
-    """Return a short quote centered around the first matching query token."""
-    raw = (text or "").strip()
-    if not raw:
-        return ""
-
-    norm = normalize_arabic(raw)
-
-    hit_pos = None
-    for t in query_tokens:
-        if not t:
-            continue
-        p = norm.find(t)
-        if p != -1:
-            hit_pos = p
-            break
-
+def _quote_window(raw: str, hit_pos: Optional[int], max_chars: int) -> str:
     if hit_pos is None:
         return raw[:max_chars].strip()
 
@@ -200,29 +402,33 @@ def _slice_quote(text: str, query_tokens: List[str], max_chars: int = 700) -> st
     return snippet
 
 
-def _norm_contains(hay: str, needle: str) -> bool:
-    hay_n = normalize_arabic(hay or "")
-    nee_n = normalize_arabic(needle or "")
-    return bool(nee_n) and (nee_n in hay_n)
+def _quote_at(text: str, first: Dict[str, int], query_tokens: List[str], max_chars: int = 700) -> str:
+    """
+    Quote centered around the first query token (in query order) present in
+    the chunk; `first` maps token -> raw offset in `text` (see _QuoteOffsets).
+    """
+    raw = (text or "").strip()
+    if not raw:
+        return ""
 
+    hit_pos = None
+    for t in query_tokens:
+        p = first.get(t)
+        if p is not None:
+            hit_pos = p - (len(text) - len(text.lstrip()))
+            break
 
-def _match_section(ch: Dict[str, Any], section_hint: str | None) -> bool:
-    if not section_hint:
-        return True
-    sec = ch.get("section") or ""
-    txt = ch.get("text") or ""
-    return _norm_contains(sec, section_hint) or _norm_contains(txt, section_hint)
+    return _quote_window(raw, hit_pos, max_chars)
 
 
-def _exclude_by_hints(ch: Dict[str, Any], exclude_hints: List[str]) -> bool:
-    if not exclude_hints:
-        return False
-    sec = ch.get("section") or ""
-    txt = ch.get("text") or ""
-    for h in exclude_hints:
-        if _norm_contains(sec, h) or _norm_contains(txt, h):
-            return True
-    return False
+def _slice_quote(text: str, query_tokens: List[str], max_chars: int = 700) -> str:
+    """Return a short quote centered around the first matching query token."""
+    toks, starts = tokenize_with_offsets(text or "")
+    return _quote_at(text or "", _first_offsets(toks, starts), query_tokens, max_chars)
+
+
+def _cache_key(evidence_query: Dict[str, Any], top_k: int, min_score: float) -> Tuple[Any, ...]:
+    return (_query_key(evidence_query), top_k, float(min_score))
 
 
 def retrieve_evidence(
@@ -239,75 +445,392 @@ def retrieve_evidence(
       - must_include_any_keywords -> OR tokens
       - section_hint / exclude_hints
       - boost_keywords
+
+    Repeated queries are served from an in-process LRU that is dropped
+    whenever a KB file changes.
     """
+    key = _cache_key(evidence_query, top_k, min_score)
+    kb_version = _kb_version()
+
+    hits = _EVIDENCE_CACHE.get(key, kb_version)
+    if hits is None:
+        count("evidence_cache_misses")
+        hits = _retrieve_uncached(evidence_query, top_k=top_k, min_score=min_score)
+        _EVIDENCE_CACHE.put(key, kb_version, hits)
+    else:
+        count("evidence_cache_hits")
+
+    return [dict(h) for h in hits]
+
+
+@dataclass
+class _KBPart:
+    """One KB file searched by a query, with the chunk ids passing its hard filters."""
+    chunks: Sequence[Dict[str, Any]]
+    index: BM25Index
+    filters: FilterIndex
+    quotes: _QuoteOffsets
+    candidates: Optional[List[int]]
+    # queries with the same group can be ranked together in one pass
+    group: Tuple[Any, ...]
+
+
+@dataclass
+class _QueryPlan:
+    doc_name: str
+    query_tokens: List[str]
+    boost_norm: List[str]
+    parts: List[_KBPart]
+
+
+def _plan_query(evidence_query: Dict[str, Any]) -> Optional[_QueryPlan]:
+    """Tokenize the query and apply its hard filters; None if nothing to search for."""
     q = build_query(evidence_query)
     if not q:
-        return []
+        return None
 
     doc_name = (evidence_query or {}).get("doc") or ""
     paths = _chunks_paths_by_doc(doc_name)
 
     query_tokens = tokenize(q)
     if not query_tokens:
-        return []
+        return None
 
     must_all = (evidence_query or {}).get("must_include_keywords") or []
     must_any = (evidence_query or {}).get("must_include_any_keywords") or []
+    section_hint = (evidence_query or {}).get("section_hint")
+    exclude_hints = (evidence_query or {}).get("exclude_hints") or []
 
-    hits: List[Tuple[float, Dict[str, Any]]] = []
+    parts: List[_KBPart] = []
 
     for path in paths:
-        chunks = _load_chunks(path)
+        kb_file, version, doc_range = _kb_source(_resolve_kb_file(str(path)))
+        chunks = _load_chunks(kb_file, version)
 
         if not chunks:
             continue
 
-        section_hint = (evidence_query or {}).get("section_hint")
-        exclude_hints = (evidence_query or {}).get("exclude_hints") or []
+        filters = _load_filters(kb_file, version)
+        with stage("filter"):
+            candidates: List[int] | None = filters.candidates(
+                section_hint=section_hint,
+                exclude_hints=exclude_hints,
+                must_include_all=must_all,
+                must_include_any=must_any,
+            )
 
-        filtered_chunks = [
-            ch for ch in chunks
-            if _match_section(ch, section_hint)
-            and not _exclude_by_hints(ch, exclude_hints)
-            and _hard_filter_all_tokens(ch.get("text", ""), must_all)
-            and _hard_filter_any_tokens(ch.get("text", ""), must_any)
-        ]
+        if doc_range is not None:
+            # BM25 statistics over the range equal those of the per-doc file
+            lo, hi = doc_range
+            in_range = [i for i in candidates if lo <= i < hi] if candidates is not None else []
+            if in_range:
+                candidates, group = in_range, tuple(in_range)
+            else:
+                # whole doc: scored with the range's precomputed statistics
+                candidates, group = range(lo, hi), ("range", lo, hi)
+        elif candidates:
+            group = tuple(candidates)
+        else:
+            candidates = group = None
+        count("chunks_candidates", len(candidates) if candidates is not None else len(chunks))
+
+        parts.append(
+            _KBPart(
+                chunks=chunks,
+                index=_load_index(kb_file, version),
+                filters=filters,
+                quotes=_load_quotes(kb_file, version),
+                candidates=candidates,
+                group=(kb_file, version, group),
+            )
+        )
 
-        if not filtered_chunks:
-            filtered_chunks = chunks
+    boost = evidence_query.get("boost_keywords") or []
+    boost_norm = [normalize_arabic(x) for x in boost if x]
 
-        docs_tokens = [tokenize(ch.get("text", "")) for ch in filtered_chunks]
-        scores = _bm25_rank(query_tokens, docs_tokens)
+    return _QueryPlan(doc_name=doc_name, query_tokens=query_tokens, boost_norm=boost_norm, parts=parts)
 
-        for ch, sc in zip(filtered_chunks, scores):
-            if sc < min_score:
-                continue
 
-            full_text = ch.get("text") or ""
-            quote = _slice_quote(full_text, query_tokens, max_chars=700)
-
-            hits.append(
-                (sc, {
-                    "score": sc,
-                    "doc": ch.get("doc_id") or doc_name,
-                    "source": ch.get("source"),
-                    "chunk_id": ch.get("chunk_id"),
-                    "page": ch.get("page"),
-                    "section": ch.get("section"),
-                    "quote": quote,
-                })
-            )
+def _hit_quote(part: _KBPart, i: int, plan: _QueryPlan) -> str:
+    with stage("quote"):
+        return _quote_at(part.chunks[i].get("text") or "", part.quotes.first(i), plan.query_tokens, max_chars=700)
+
+
+def _make_hit(part: _KBPart, i: int, score: float, plan: _QueryPlan, quote: Optional[str] = None) -> Dict[str, Any]:
+    ch = part.chunks[i]
+    return {
+        "score": score,
+        "doc": ch.get("doc_id") or plan.doc_name,
+        "source": ch.get("source"),
+        "chunk_id": ch.get("chunk_id"),
+        "page": ch.get("page"),
+        "section": ch.get("section"),
+        "quote": _hit_quote(part, i, plan) if quote is None else quote,
+    }
 
-    boost = evidence_query.get("boost_keywords") or []
-    boost_norm = [normalize_arabic(x) for x in boost if x]
 
-    def boosted_score(hit: Dict[str, Any]) -> float:
-        qn = normalize_arabic(hit.get("quote", ""))
+def _collect(
+    plan: _QueryPlan,
+    top_k: int,
+    min_score: float,
+    ranked: Optional[List[List[Tuple[int, float]]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Turn a plan into the final top_k hits. `ranked` optionally carries
+    precomputed `top_k` results per part (from a batched pass).
+    Quotes are only built for the hits that are returned; boost keywords
+    are matched against the chunks' pre-normalized text.
+    """
+    if top_k > 0 and not any(plan.boost_norm):
+        # Order is by BM25 score alone (ties in corpus order): rank first,
+        # then build quotes for the winners only.
+        merged: List[Tuple[float, int, int, float]] = []
+        for pi, part in enumerate(plan.parts):
+            if ranked is not None:
+                part_ranked = ranked[pi]
+            else:
+                with stage("bm25"):
+                    part_ranked = part.index.top_k(plan.query_tokens, top_k, part.candidates, min_score)
+            merged.extend((-sc, pi, d, sc) for d, sc in part_ranked)
+        merged.sort()
+        return [_make_hit(plan.parts[pi], d, sc, plan) for _, pi, d, sc in merged[:top_k]]
+
+    found: List[Tuple[int, int, float]] = []
+    for pi, part in enumerate(plan.parts):
+        with stage("bm25"):
+            part_hits = part.index.hits(plan.query_tokens, part.candidates, min_score)
+        found.extend((pi, i, sc) for i, sc in part_hits)
+
+    # Each boost keyword found in the (pre-normalized) chunk text adds 2.0.
+    boost_docs = [
+        [part.filters.texts_containing(b) for b in plan.boost_norm if b]
+        for part in plan.parts
+    ]
+
+    def boosted_score(hit: Tuple[int, int, float]) -> float:
+        pi, i, sc = hit
         extra = 0.0
-        for b in boost_norm:
-            if b and b in qn:
+        for docs in boost_docs[pi]:
+            if i in docs:
                 extra += 2.0
-        return float(hit.get("score", 0.0)) + extra
+        return float(sc) + extra
+
+    if top_k > 0:
+        top = _top_boosted(found, top_k, boosted_score, 2.0 * max((len(d) for d in boost_docs), default=0))
+    else:
+        found.sort(key=boosted_score, reverse=True)
+        top = found[:top_k]
+    return [_make_hit(plan.parts[pi], i, sc, plan) for pi, i, sc in top]
+
+
+def _top_boosted(
+    found: List[Tuple[int, int, float]],
+    top_k: int,
+    boosted_score,
+    max_extra: float,
+) -> List[Tuple[int, int, float]]:
+    """
+    The top_k of `found` by boosted score desc, ties in (part, corpus) order.
+
+    Hits are visited in BM25 order through a heap; once even the largest
+    possible boost cannot lift the next hit above the current k-th boosted
+    score, the rest are skipped (MaxScore-style).
+    """
+    order = [(-sc, pi, i) for pi, i, sc in found]
+    heapq.heapify(order)
+
+    best: List[Tuple[float, int, int, float]] = []  # min-heap of (total, -pi, -i, sc)
+    while order:
+        neg_sc, pi, i = heapq.heappop(order)
+        sc = -neg_sc
+        if len(best) == top_k and float(sc) + max_extra < best[0][0]:
+            break
+        entry = (boosted_score((pi, i, sc)), -pi, -i, sc)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    best.sort(reverse=True)
+    return [(-npi, -ni, sc) for _, npi, ni, sc in best]
+
+
+def _retrieve_uncached(
+    evidence_query: Dict[str, Any],
+    top_k: int = config.DEFAULT_TOP_K,
+    min_score: float = config.DEFAULT_MIN_SCORE,
+) -> List[Dict[str, Any]]:
+    plan = _plan_query(evidence_query)
+    if plan is None:
+        return []
+    return _collect(plan, top_k, min_score)
+
+
+def _query_key(evidence_query: Dict[str, Any]) -> str:
+    """Canonical key for an evidence_query (dict key order does not matter)."""
+    return json.dumps(evidence_query or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _kb_version() -> Tuple[str, ...]:
+    """Fingerprints of every KB file a query can resolve to."""
+    return tuple(
+        _kb_fingerprint(_resolve_kb_file(str(p)))
+        for p in (config.KB_ALL_PATH, config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH)
+    )
+
+
+def preload_kb() -> None:
+    """
+    Load every KB's chunks, BM25 index and filter index up front (no-op if
+    the KB is not built). Worker processes forked afterwards share them.
+    """
+    if not config.kb_ready():
+        return
+    for p in (config.KB_ALL_PATH, config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH):
+        kb_file, version, doc_range = _kb_source(_resolve_kb_file(str(p)))
+        index = _load_index(kb_file, version)
+        index._numpy()
+        if doc_range is not None:
+            index.range_stats(*doc_range)
+        filters = _load_filters(kb_file, version)
+        if filters.n_docs:
+            filters.text_norm(0)  # normalizes every section/text once
+
+
+class _EvidenceCache:
+    """Size-bounded LRU of retrieval results, invalidated when the KB version changes."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Any, ...], List[Dict[str, Any]]]" = OrderedDict()
+        self._kb_version: Tuple[str, ...] | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, kb_version: Tuple[str, ...]) -> None:
+        if kb_version != self._kb_version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._kb_version = kb_version
+
+    def get(self, key: Tuple[Any, ...], kb_version: Tuple[str, ...]) -> List[Dict[str, Any]] | None:
+        with self._lock:
+            self._check_version(kb_version)
+            hits = self._data.get(key)
+            if hits is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return hits
+
+    def put(self, key: Tuple[Any, ...], kb_version: Tuple[str, ...], hits: List[Dict[str, Any]]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(kb_version)
+            self._data[key] = [dict(h) for h in hits]
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+_EVIDENCE_CACHE = _EvidenceCache(config.EVIDENCE_CACHE_SIZE)
+
+
+def evidence_cache_stats() -> Dict[str, int]:
+    """Hit/miss/eviction counters of the evidence result cache (for metrics scraping)."""
+    return _EVIDENCE_CACHE.stats()
+
+
+def clear_evidence_cache() -> None:
+    _EVIDENCE_CACHE.clear()
+
+
+def clear_kb_caches() -> None:
+    """Drop every loaded KB (chunks, indexes, filters, hashes) and cached evidence."""
+    for loader in (_load_chunks, _doc_range, _load_index, _load_filters, _load_quotes,
+                   _load_sentences, _content_hash, _binary_source):
+        loader.cache_clear()
+    clear_evidence_cache()
+
+
+def retrieve_evidence_batch(
+    queries: List[Dict[str, Any]],
+    top_k: int = config.DEFAULT_TOP_K,
+    min_score: float = config.DEFAULT_MIN_SCORE,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Retrieve evidence for many queries at once.
+
+    Identical queries are scored once and the hits are fanned back out;
+    result[i] holds the hits for queries[i] (each list/dict is a fresh copy).
+    Unique queries that search the same KB file with the same candidate set
+    are ranked together in one pass (a score matrix with the NumPy backend).
+    """
+    unique: Dict[str, Dict[str, Any]] = {}
+    keys: List[str] = []
+    for eq in queries:
+        key = _query_key(eq)
+        unique.setdefault(key, eq)
+        keys.append(key)
+
+    kb_version = _kb_version()
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    pending: Dict[str, _QueryPlan] = {}
+
+    for key, eq in unique.items():
+        cached = _EVIDENCE_CACHE.get(_cache_key(eq, top_k, min_score), kb_version)
+        if cached is not None:
+            count("evidence_cache_hits")
+            results[key] = cached
+            continue
+        count("evidence_cache_misses")
+        plan = _plan_query(eq)
+        if plan is None:
+            results[key] = []
+            _EVIDENCE_CACHE.put(_cache_key(eq, top_k, min_score), kb_version, [])
+            continue
+        pending[key] = plan
+
+    groups: Dict[Tuple[Any, ...], List[str]] = {}
+    for key, plan in pending.items():
+        if top_k > 0 and not any(plan.boost_norm) and len(plan.parts) == 1:
+            groups.setdefault(plan.parts[0].group, []).append(key)
+
+    ranked: Dict[str, List[List[Tuple[int, float]]]] = {}
+    for group_keys in groups.values():
+        part = pending[group_keys[0]].parts[0]
+        with stage("bm25"):
+            lists = part.index.top_k_many(
+                [pending[key].query_tokens for key in group_keys], top_k, part.candidates, min_score
+            )
+        for key, part_ranked in zip(group_keys, lists):
+            ranked[key] = [part_ranked]
+
+    for key, plan in pending.items():
+        hits = _collect(plan, top_k, min_score, ranked.get(key))
+        _EVIDENCE_CACHE.put(_cache_key(unique[key], top_k, min_score), kb_version, hits)
+        results[key] = hits
 
-    hits.sort(key=lambda x: boosted_score(x[1]), reverse=True)
-    return [h[1] for h in hits[:top_k]]
+    return [[dict(h) for h in results[key]] for key in keys]
@@ -0,0 +1,264 @@
+# src/rule_columns.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional: falls back to plain list scans
+    np = None
+
+from .rule_engine import (
+    ROOM_CHECKS,
+    RulePlan,
+    _evidence_query,
+    _get_area,
+    _get_has_window,
+    _get_min_dim,
+    _normalize_type,
+    rule_plan,
+)
+from .rules_registry import Rule
+
+
+class RoomColumns:
+    """
+    Rooms in columnar form: one sequence per field, row i = room i.
+
+    - types: room type names (normalized like `evaluate_rooms` does)
+    - area / min_dim: floats, None when missing
+    - has_window: True / False / None (missing)
+
+    `from_rooms()` converts a list of room dicts once (same field lookups as
+    `rule_engine`). With NumPy installed the numeric columns are float64
+    arrays and rows are grouped by type code.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[Any],
+        types: Sequence[Optional[str]],
+        area: Sequence[Optional[float]],
+        min_dim: Sequence[Optional[float]],
+        has_window: Sequence[Optional[bool]],
+    ) -> None:
+        n = len(ids)
+        if not (len(types) == len(area) == len(min_dim) == len(has_window) == n):
+            raise ValueError("RoomColumns: all columns must have the same length")
+
+        self.ids = list(ids)
+        self.types = [_normalize_type(t or "Unknown") for t in types]
+        self.n_rooms = n
+
+        # type name -> code; rows grouped by type (ascending row order)
+        self.type_names: List[str] = list(dict.fromkeys(self.types))
+        code_of = {t: c for c, t in enumerate(self.type_names)}
+        codes = [code_of[t] for t in self.types]
+
+        area_vals = [_as_float(v) for v in area]
+        dim_vals = [_as_float(v) for v in min_dim]
+
+        if np is not None:
+            self.codes = np.asarray(codes, dtype=np.int32)
+            self.area = np.asarray([0.0 if v is None else v for v in area_vals], dtype=np.float64)
+            self.area_missing = np.asarray([v is None for v in area_vals], dtype=bool)
+            self.min_dim = np.asarray([0.0 if v is None else v for v in dim_vals], dtype=np.float64)
+            self.min_dim_missing = np.asarray([v is None for v in dim_vals], dtype=bool)
+            # -1 missing, 0 no window, 1 window
+            self.window = np.asarray(
+                [-1 if v is None else int(bool(v)) for v in has_window], dtype=np.int8
+            )
+            order = np.argsort(self.codes, kind="stable")
+            bounds = np.searchsorted(self.codes[order], np.arange(len(self.type_names) + 1))
+            self._rows = {
+                t: order[bounds[c]:bounds[c + 1]] for c, t in enumerate(self.type_names)
+            }
+        else:
+            self.codes = codes
+            self.area = [0.0 if v is None else v for v in area_vals]
+            self.area_missing = [v is None for v in area_vals]
+            self.min_dim = [0.0 if v is None else v for v in dim_vals]
+            self.min_dim_missing = [v is None for v in dim_vals]
+            self.window = [-1 if v is None else int(bool(v)) for v in has_window]
+            rows: Dict[str, List[int]] = {t: [] for t in self.type_names}
+            for i, t in enumerate(self.types):
+                rows[t].append(i)
+            self._rows = rows
+
+    @classmethod
+    def from_rooms(cls, rooms: Optional[List[Dict[str, Any]]]) -> "RoomColumns":
+        ids: List[Any] = []
+        types: List[str] = []
+        area: List[Optional[float]] = []
+        min_dim: List[Optional[float]] = []
+        has_window: List[Optional[bool]] = []
+        for r in rooms or []:
+            ids.append(r.get("id"))
+            types.append(r.get("type") or "Unknown")
+            area.append(_get_area(r))
+            min_dim.append(_get_min_dim(r))
+            has_window.append(_get_has_window(r))
+        return cls(ids, types, area, min_dim, has_window)
+
+    def __len__(self) -> int:
+        return self.n_rooms
+
+    def rows_of(self, rtype: str):
+        """Row indexes of rooms of this (normalized) type, ascending."""
+        return self._rows.get(rtype, ())
+
+    def type_counts(self) -> Dict[str, int]:
+        return {t: len(rows) for t, rows in self._rows.items()}
+
+
+def _as_float(v: Any) -> Optional[float]:
+    try:
+        return float(v) if v is not None else None
+    except Exception:
+        return None
+
+
+def _split_rows(col, missing_col, rows, threshold: float) -> Tuple[List[int], List[int]]:
+    """(rows with a missing value, rows with value < threshold)."""
+    if np is not None:
+        if len(rows) == 0:
+            return [], []
+        missing = missing_col[rows]
+        failing = ~missing & (col[rows] < threshold)
+        return rows[missing].tolist(), rows[failing].tolist()
+    missing = [i for i in rows if missing_col[i]]
+    failing = [i for i in rows if not missing_col[i] and col[i] < threshold]
+    return missing, failing
+
+
+def _window_rows(col, rows) -> Tuple[List[int], List[int]]:
+    """(rows with unknown window, rows without a window)."""
+    if np is not None:
+        if len(rows) == 0:
+            return [], []
+        vals = col[rows]
+        return rows[vals < 0].tolist(), rows[vals == 0].tolist()
+    return [i for i in rows if col[i] < 0], [i for i in rows if col[i] == 0]
+
+
+def _value(col, i: int) -> float:
+    return float(col[i])
+
+
+Finding = Tuple[int, int, Dict[str, Any]]
+
+
+def _eval_rule(
+    pos: int,
+    rule: Rule,
+    cols: RoomColumns,
+    violations: List[Finding],
+    warnings: List[Finding],
+    skipped: List[Finding],
+) -> None:
+    ids = cols.ids
+    for rtype in dict.fromkeys(rule.applies_to):
+        rows = cols.rows_of(rtype)
+        if len(rows) == 0:
+            continue
+
+        if rule.check == "unknown_type":
+            for i in (rows.tolist() if np is not None else rows):
+                warnings.append((i, pos, {
+                    "rule_id": rule.id,
+                    "severity": rule.severity,
+                    "room_id": ids[i],
+                    "room_type": rtype,
+                    "message": "نوع الغرفة غير معروف؛ يلزم تأكيد المستخدم قبل التحقق من الاشتراطات",
+                    "expected": None,
+                    "actual": None,
+                    "evidence_query": _evidence_query(rule),
+                }))
+            continue
+
+        if rule.check == "has_window":
+            missing, failing = _window_rows(cols.window, rows)
+            field = "ventilation.has_window"
+        elif rule.check == "min_area":
+            missing, failing = _split_rows(cols.area, cols.area_missing, rows, float(rule.threshold or 0))
+            field = "metrics.area_sqm"
+        else:  # min_width
+            missing, failing = _split_rows(cols.min_dim, cols.min_dim_missing, rows, float(rule.threshold or 0))
+            field = "metrics.min_dimension_m"
+
+        for i in missing:
+            skipped.append((i, pos, {
+                "rule_id": rule.id,
+                "room_id": ids[i],
+                "room_type": rtype,
+                "missing": field,
+            }))
+
+        for i in failing:
+            if rule.check == "has_window":
+                message = "يجب توفر نافذة لدورة المياه/المرحاض"
+                expected, actual = "has_window = True", "has_window = False"
+            elif rule.check == "min_area":
+                message = "مساحة الغرفة أقل من الحد الأدنى المطلوب"
+                expected = f"area_sqm >= {rule.threshold}"
+                actual = f"area_sqm = {_value(cols.area, i)}"
+            else:
+                message = "البعد/العرض الأدنى أقل من الحد المطلوب"
+                expected = f"min_dimension_m >= {rule.threshold}"
+                actual = f"min_dimension_m = {_value(cols.min_dim, i)}"
+            violations.append((i, pos, {
+                "rule_id": rule.id,
+                "severity": rule.severity,
+                "room_id": ids[i],
+                "room_type": rtype,
+                "message": message,
+                "expected": expected,
+                "actual": actual,
+                "evidence_query": _evidence_query(rule),
+            }))
+
+
+def evaluate_rooms_columnar(
+    rooms: Union[RoomColumns, List[Dict[str, Any]], None],
+    plan: Optional[RulePlan] = None,
+) -> Dict[str, Any]:
+    """
+    Same result as `rule_engine.evaluate_rooms`, computed rule by rule over
+    whole columns: each table threshold is one vectorized comparison over the
+    rooms of its type, and records are built only for failing/missing rows.
+    """
+    cols = rooms if isinstance(rooms, RoomColumns) else RoomColumns.from_rooms(rooms)
+    plan = plan or rule_plan()
+
+    room_violations: List[Finding] = []
+    room_warnings: List[Finding] = []
+    room_skipped: List[Finding] = []
+
+    for pos, rule in enumerate(plan.rules):
+        if rule.check in ROOM_CHECKS:
+            _eval_rule(pos, rule, cols, room_violations, room_warnings, room_skipped)
+
+    # room-major, then registry order (the order evaluate_rooms emits them in)
+    def ordered(findings: List[Finding]) -> List[Dict[str, Any]]:
+        findings.sort(key=lambda f: (f[0], f[1]))
+        return [rec for _, _, rec in findings]
+
+    violations = ordered(room_violations)
+    warnings = ordered(room_warnings)
+    skipped_missing_data = ordered(room_skipped)
+
+    type_counts = cols.type_counts()
+    for unit_check in plan.unit:
+        unit_check(type_counts, violations, warnings)
+
+    return {
+        "summary": {
+            "rooms_total": len(cols),
+            "violations_total": len(violations),
+            "warnings_total": len(warnings),
+            "skipped_missing_data": len(skipped_missing_data),
+        },
+        "violations": violations,
+        "warnings": warnings,
+        "skipped": skipped_missing_data,
+    }
@@ -1,8 +1,12 @@
 # src/rule_engine.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+import threading
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .rules_registry import ROOM_TYPES, build_rules
+from . import rules_registry
+from .rules_registry import ROOM_TYPES, Rule
 
 
 def _get_area(room: Dict[str, Any]) -> Optional[float]:
@@ -51,145 +55,236 @@ def _normalize_type(t: str) -> str:
     return t if t in ROOM_TYPES else "Unknown"
 
 
+# Per-room check kinds (anything else is unit-level or ignored)
+ROOM_CHECKS = frozenset({"unknown_type", "min_area", "min_width", "has_window"})
+
+# (room, room_id, rtype, violations, warnings, skipped) -> None
+RoomCheck = Callable[..., None]
+# (type_counts, violations, warnings) -> None
+UnitCheck = Callable[..., None]
+
+
+def _evidence_query(rule: Rule) -> Optional[Dict[str, Any]]:
+    """A fresh copy of the rule's evidence_query per finding (the compiled plan is shared)."""
+    eq = rule.evidence_query
+    if eq is None:
+        return None
+    return {k: list(v) if isinstance(v, list) else v for k, v in eq.items()}
+
+
+def _check_unknown_type(rule: Rule, room, room_id, rtype, violations, warnings, skipped) -> None:
+    warnings.append({
+        "rule_id": rule.id,
+        "severity": rule.severity,
+        "room_id": room_id,
+        "room_type": rtype,
+        "message": "نوع الغرفة غير معروف؛ يلزم تأكيد المستخدم قبل التحقق من الاشتراطات",
+        "expected": None,
+        "actual": None,
+        "evidence_query": _evidence_query(rule),
+    })
+
+
+def _check_min_area(rule: Rule, threshold: float, room, room_id, rtype, violations, warnings, skipped) -> None:
+    area = _get_area(room)
+    if area is None:
+        skipped.append({
+            "rule_id": rule.id,
+            "room_id": room_id,
+            "room_type": rtype,
+            "missing": "metrics.area_sqm",
+        })
+        return
+
+    if area < threshold:
+        violations.append({
+            "rule_id": rule.id,
+            "severity": rule.severity,
+            "room_id": room_id,
+            "room_type": rtype,
+            "message": "مساحة الغرفة أقل من الحد الأدنى المطلوب",
+            "expected": f"area_sqm >= {rule.threshold}",
+            "actual": f"area_sqm = {area}",
+            "evidence_query": _evidence_query(rule),
+        })
+
+
+def _check_min_width(rule: Rule, threshold: float, room, room_id, rtype, violations, warnings, skipped) -> None:
+    dim = _get_min_dim(room)
+    if dim is None:
+        skipped.append({
+            "rule_id": rule.id,
+            "room_id": room_id,
+            "room_type": rtype,
+            "missing": "metrics.min_dimension_m",
+        })
+        return
+
+    if dim < threshold:
+        violations.append({
+            "rule_id": rule.id,
+            "severity": rule.severity,
+            "room_id": room_id,
+            "room_type": rtype,
+            "message": "البعد/العرض الأدنى أقل من الحد المطلوب",
+            "expected": f"min_dimension_m >= {rule.threshold}",
+            "actual": f"min_dimension_m = {dim}",
+            "evidence_query": _evidence_query(rule),
+        })
+
+
+def _check_has_window(rule: Rule, room, room_id, rtype, violations, warnings, skipped) -> None:
+    has_window = _get_has_window(room)
+    if has_window is None:
+        skipped.append({
+            "rule_id": rule.id,
+            "room_id": room_id,
+            "room_type": rtype,
+            "missing": "ventilation.has_window",
+        })
+        return
+
+    if has_window is False:
+        violations.append({
+            "rule_id": rule.id,
+            "severity": rule.severity,
+            "room_id": room_id,
+            "room_type": rtype,
+            "message": "يجب توفر نافذة لدورة المياه/المرحاض",
+            "expected": "has_window = True",
+            "actual": "has_window = False",
+            "evidence_query": _evidence_query(rule),
+        })
+
+
+def _check_unit_min_count(rule: Rule, type_counts, violations, warnings) -> None:
+    count_types = rule.count_types or []
+    required = int(rule.threshold or 1)
+
+    if not count_types:
+        warnings.append({
+            "rule_id": rule.id,
+            "severity": "warning",
+            "room_id": None,
+            "room_type": "__UNIT__",
+            "message": "قاعدة مستوى الوحدة ينقصها إعداد count_types",
+            "expected": None,
+            "actual": None,
+            "evidence_query": _evidence_query(rule),
+        })
+        return
+
+    actual_count = sum(type_counts.get(t, 0) for t in count_types)
+
+    if actual_count < required:
+        violations.append({
+            "rule_id": rule.id,
+            "severity": rule.severity,
+            "room_id": None,
+            "room_type": "__UNIT__",
+            "message": "الوحدة السكنية ينقصها عنصر مطلوب",
+            "expected": f"count({count_types}) >= {required}",
+            "actual": f"count({count_types}) = {actual_count}",
+            "evidence_query": dict(_evidence_query(rule) or {}, **{"count_types": list(count_types)}),
+        })
+
+
+def _bind_room_check(rule: Rule) -> Optional[RoomCheck]:
+    if rule.check == "unknown_type":
+        return partial(_check_unknown_type, rule)
+    if rule.check == "min_area":
+        return partial(_check_min_area, rule, float(rule.threshold or 0))
+    if rule.check == "min_width":
+        return partial(_check_min_width, rule, float(rule.threshold or 0))
+    if rule.check == "has_window":
+        return partial(_check_has_window, rule)
+    return None
+
+
+@dataclass(frozen=True)
+class RulePlan:
+    """
+    Rules compiled for evaluation: room type -> checkers (in registry order),
+    plus the unit-level checkers run once per plan.
+    """
+    by_type: Dict[str, Tuple[RoomCheck, ...]]
+    unit: Tuple[UnitCheck, ...]
+    rules: Tuple[Rule, ...]
+
+
+def compile_rules(rules: List[Rule]) -> RulePlan:
+    by_type: Dict[str, List[RoomCheck]] = {}
+    unit: List[UnitCheck] = []
+
+    for rule in rules:
+        check = _bind_room_check(rule)
+        if check is not None:
+            for rtype in dict.fromkeys(rule.applies_to):
+                by_type.setdefault(rtype, []).append(check)
+        elif rule.check == "unit_min_count" and "__UNIT__" in rule.applies_to:
+            unit.append(partial(_check_unit_min_count, rule))
+
+    return RulePlan(
+        by_type={t: tuple(checks) for t, checks in by_type.items()},
+        unit=tuple(unit),
+        rules=tuple(rules),
+    )
+
+
+_PLAN_LOCK = threading.Lock()
+_PLAN: Optional[Tuple[Any, RulePlan]] = None
+
+
+def _registry_key() -> Any:
+    # cheap fingerprint of what build_rules() reads; a new build_rules or
+    # edited limits/room types recompiles the plan
+    return (
+        rules_registry.build_rules,
+        tuple(rules_registry.TABLE_LIMITS.items()),
+        frozenset(rules_registry.ROOM_TYPES),
+    )
+
+
+def rule_plan() -> RulePlan:
+    """The compiled plan for the current registry (rebuilt only when it changes)."""
+    global _PLAN
+    key = _registry_key()
+    cached = _PLAN
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _PLAN_LOCK:
+        if _PLAN is None or _PLAN[0] != key:
+            _PLAN = (key, compile_rules(rules_registry.build_rules()))
+        return _PLAN[1]
+
+
 def evaluate_rooms(rooms: List[Dict[str, Any]]) -> Dict[str, Any]:
-    rules = build_rules()
+    """
+    Check rooms against the compiled rule plan. Rooms already held in
+    columnar form (`rule_columns.RoomColumns`) are evaluated column-wise.
+    """
+    plan = rule_plan()
+    if rooms is not None and not isinstance(rooms, list):
+        from .rule_columns import RoomColumns, evaluate_rooms_columnar
+
+        if isinstance(rooms, RoomColumns):
+            return evaluate_rooms_columnar(rooms, plan)
+    by_type = plan.by_type
     violations: List[Dict[str, Any]] = []
     warnings: List[Dict[str, Any]] = []
     skipped_missing_data: List[Dict[str, Any]] = []
+    type_counts: Dict[str, int] = {}
 
     for room in rooms or []:
         room_id = room.get("id")
         rtype = _normalize_type(room.get("type") or "Unknown")
+        type_counts[rtype] = type_counts.get(rtype, 0) + 1
 
-        for rule in rules:
-            if rtype not in rule.applies_to:
-                continue
-
-            if rule.check == "unknown_type":
-                warnings.append({
-                    "rule_id": rule.id,
-                    "severity": rule.severity,
-                    "room_id": room_id,
-                    "room_type": rtype,
-                    "message": "نوع الغرفة غير معروف؛ يلزم تأكيد المستخدم قبل التحقق من الاشتراطات",
-                    "expected": None,
-                    "actual": None,
-                    "evidence_query": rule.evidence_query,
-                })
-                continue
-
-            if rule.check == "min_area":
-                area = _get_area(room)
-                if area is None:
-                    skipped_missing_data.append({
-                        "rule_id": rule.id,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "missing": "metrics.area_sqm",
-                    })
-                    continue
-
-                if area < float(rule.threshold or 0):
-                    violations.append({
-                        "rule_id": rule.id,
-                        "severity": rule.severity,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "message": "مساحة الغرفة أقل من الحد الأدنى المطلوب",
-                        "expected": f"area_sqm >= {rule.threshold}",
-                        "actual": f"area_sqm = {area}",
-                        "evidence_query": rule.evidence_query,
-                    })
-                continue
-
-            if rule.check == "min_width":
-                dim = _get_min_dim(room)
-                if dim is None:
-                    skipped_missing_data.append({
-                        "rule_id": rule.id,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "missing": "metrics.min_dimension_m",
-                    })
-                    continue
-
-                if dim < float(rule.threshold or 0):
-                    violations.append({
-                        "rule_id": rule.id,
-                        "severity": rule.severity,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "message": "البعد/العرض الأدنى أقل من الحد المطلوب",
-                        "expected": f"min_dimension_m >= {rule.threshold}",
-                        "actual": f"min_dimension_m = {dim}",
-                        "evidence_query": rule.evidence_query,
-                    })
-                continue
-
-            if rule.check == "has_window":
-                has_window = _get_has_window(room)
-                if has_window is None:
-                    skipped_missing_data.append({
-                        "rule_id": rule.id,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "missing": "ventilation.has_window",
-                    })
-                    continue
-
-                if has_window is False:
-                    violations.append({
-                        "rule_id": rule.id,
-                        "severity": rule.severity,
-                        "room_id": room_id,
-                        "room_type": rtype,
-                        "message": "يجب توفر نافذة لدورة المياه/المرحاض",
-                        "expected": "has_window = True",
-                        "actual": "has_window = False",
-                        "evidence_query": rule.evidence_query,
-                    })
-                continue
+        for check in by_type.get(rtype, ()):
+            check(room, room_id, rtype, violations, warnings, skipped_missing_data)
 
-    type_counts: Dict[str, int] = {}
-    for r in rooms or []:
-        t = _normalize_type(r.get("type") or "Unknown")
-        type_counts[t] = type_counts.get(t, 0) + 1
-
-    for rule in rules:
-        if rule.check != "unit_min_count":
-            continue
-        if "__UNIT__" not in rule.applies_to:
-            continue
-
-        count_types = rule.count_types or []
-        required = int(rule.threshold or 1)
-
-        if not count_types:
-            warnings.append({
-                "rule_id": rule.id,
-                "severity": "warning",
-                "room_id": None,
-                "room_type": "__UNIT__",
-                "message": "قاعدة مستوى الوحدة ينقصها إعداد count_types",
-                "expected": None,
-                "actual": None,
-                "evidence_query": rule.evidence_query,
-            })
-            continue
-
-        actual_count = sum(type_counts.get(t, 0) for t in count_types)
-
-        if actual_count < required:
-            violations.append({
-                "rule_id": rule.id,
-                "severity": rule.severity,
-                "room_id": None,
-                "room_type": "__UNIT__",
-                "message": "الوحدة السكنية ينقصها عنصر مطلوب",
-                "expected": f"count({count_types}) >= {required}",
-                "actual": f"count({count_types}) = {actual_count}",
-                "evidence_query": dict(rule.evidence_query or {}, **{"count_types": count_types}),
-            })
+    for unit_check in plan.unit:
+        unit_check(type_counts, violations, warnings)
 
     return {
         "summary": {
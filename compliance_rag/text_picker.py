@@ -1,41 +1,91 @@
 # src/text_picker.py
+"""
+Requirement-sentence picking.
+
+Sentences are the pieces of a text between `AR_SENTENCE_SPLIT` separators,
+stripped, longer than 10 characters. The KB builder stores each chunk's
+sentence spans (`sentences`: [[start, end, has_obligation], ...], raw
+offsets) so the runtime only has to score them.
+"""
+from __future__ import annotations
+
 import re
-from typing import List, Optional
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 AR_SENTENCE_SPLIT = r"[.\n؟!؛]+"
 
+# bump whenever the splitter or the obligation terms change (stale
+# build-time spans are then recomputed at runtime)
+SENTENCE_VERSION = 1
 
-def pick_best_sentence(text: str, prefer: List[str]) -> Optional[str]:
-    """
-    Pick one short sentence that is likely to express a requirement:
-    - Contains obligation terms (e.g., يجب / لا يجوز / يلزم / يشترط)
-    - Boosted by preferred keywords when provided
-    """
-    if not text:
-        return None
+OBLIGATION_TERMS = ("يجب", "لا يجوز", "يلزم", "يشترط")
 
-    sentences = [
-        s.strip()
-        for s in re.split(AR_SENTENCE_SPLIT, text)
-        if len(s.strip()) > 10
-    ]
+_SPLIT_RE = re.compile(AR_SENTENCE_SPLIT)
 
-    scored = []
-    for s in sentences:
-        score = 0
+Span = Tuple[int, int, bool]
 
-        if any(k in s for k in ["يجب", "لا يجوز", "يلزم", "يشترط"]):
-            score += 3
 
-        for kw in prefer:
-            if kw in s:
-                score += 2
+def sentence_spans(text: str) -> List[Span]:
+    """(start, end, has_obligation) of every sentence of `text`."""
+    spans: List[Span] = []
+    pos = 0
+    for m in _SPLIT_RE.finditer(text + "."):
+        piece = text[pos:m.start()]
+        start = pos + len(piece) - len(piece.lstrip())
+        end = pos + len(piece.rstrip())
+        pos = m.end()
+        if end - start > 10:
+            s = text[start:end]
+            spans.append((start, end, any(k in s for k in OBLIGATION_TERMS)))
+    return spans
 
-        if score > 0:
-            scored.append((score, s))
 
-    if not scored:
+def chunk_sentences(chunk: Dict[str, Any]) -> List[Span]:
+    """Build-time sentence spans of a chunk (recomputed when missing or stale)."""
+    stored = chunk.get("sentences")
+    if stored is not None and chunk.get("sent_version") == SENTENCE_VERSION:
+        return [(int(a), int(b), bool(o)) for a, b, o in stored]
+    return sentence_spans(chunk.get("text") or "")
+
+
+def best_sentence(text: str, spans: Sequence[Span], prefer: Sequence[str]) -> Optional[str]:
+    """
+    Highest-scoring sentence (3 for an obligation term, 2 per preferred
+    keyword; first one wins ties), or None if none scores.
+    """
+    scores = [3 if obligation else 0 for _, _, obligation in spans]
+
+    if prefer:
+        starts = [a for a, _, _ in spans]
+        for kw in prefer:
+            if not kw:
+                scores = [s + 2 for s in scores]
+                continue
+            # every occurrence of kw that lies inside a sentence
+            hit = set()
+            at = text.find(kw)
+            while at != -1:
+                j = bisect_right(starts, at) - 1
+                if j >= 0 and at + len(kw) <= spans[j][1]:
+                    hit.add(j)
+                at = text.find(kw, at + 1)
+            for j in hit:
+                scores[j] += 2
+
+    best = max(scores, default=0)
+    if best <= 0:
         return None
+    a, b, _ = spans[scores.index(best)]
+    return text[a:b]
 
-    scored.sort(reverse=True, key=lambda x: x[0])
-    return scored[0][1]
+
+def pick_best_sentence(text: str, prefer: List[str]) -> Optional[str]:
+    """
+    Pick one short sentence that is likely to express a requirement:
+    - Contains obligation terms (e.g., يجب / لا يجوز / يلزم / يشترط)
+    - Boosted by preferred keywords when provided
+    """
+    if not text:
+        return None
+    return best_sentence(text, sentence_spans(text), prefer)
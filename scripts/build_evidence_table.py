@@ -0,0 +1,25 @@
+# scripts/build_evidence_table.py
+"""
+Resolve the evidence and rule_sentence of every built-in rule against the
+current KB and write config.EVIDENCE_TABLE_PATH. Run after each KB build
+(build_kb_all / ingest_kb do it for you).
+
+    python -m scripts.build_evidence_table
+"""
+import argparse
+
+from compliance_rag import config
+from compliance_rag.evidence_table import build_evidence_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the static evidence table for the built-in rules.")
+    parser.add_argument("--out", default=str(config.EVIDENCE_TABLE_PATH), help="output JSON path")
+    args = parser.parse_args()
+
+    info = build_evidence_table(args.out)
+    print(f"{info['rules']} rules -> {info['out_path']}")
+
+
+if __name__ == "__main__":
+    main()
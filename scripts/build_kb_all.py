@@ -1,8 +1,29 @@
 # scripts/build_kb_all.py
+import argparse
+import json
 from pathlib import Path
+from typing import Any, Dict, Iterator
 from compliance_rag import config
+from compliance_rag.evidence_table import build_evidence_table
+from compliance_rag.kb_binary import binary_path_for, write_kb_binary
 from scripts.kb_build_from_md import build_kb_from_md
 
+# Source documents of the KB: OCR markdown (in OCR_DIR) -> per-doc segment (in KB_DIR)
+KB_DOCS: list[Dict[str, str]] = [
+    {
+        "doc_id": "SBC1101",
+        "source": "SBC1101_MISTRAL_OCR",
+        "md": "sbc1101_ocr.md",
+        "out": "sbc1101_chunks.jsonl",
+    },
+    {
+        "doc_id": "RES_REQUIREMENTS",
+        "source": "RES_REQUIREMENTS_MISTRAL_OCR",
+        "md": "res_requirements_ocr.md",
+        "out": "res_requirements_chunks.jsonl",
+    },
+]
+
 
 def _concat_jsonl(out_path: Path, inputs: list[Path]) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -14,34 +35,59 @@ def _concat_jsonl(out_path: Path, inputs: list[Path]) -> None:
                         w.write(line)
 
 
+def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as r:
+        for line in r:
+            if line.strip():
+                yield json.loads(line)
+
+
+def build_binaries(jsonl_paths: list[Path]) -> None:
+    """Compile each JSONL KB into the mmap-able binary format next to it."""
+    for p in jsonl_paths:
+        info = write_kb_binary(_iter_jsonl(p), binary_path_for(p), source=p)
+        print(f"{p.name}: {info['chunks']} chunks -> {info['out_path']}")
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the KB from OCR markdown.")
+    parser.add_argument(
+        "--binary-only",
+        action="store_true",
+        help="only compile the existing JSONL KB files into the binary format",
+    )
+    args = parser.parse_args()
+
+    if args.binary_only:
+        build_binaries([config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH, config.KB_ALL_PATH])
+        return
+
     # ensure dirs exist
     config.OCR_DIR.mkdir(parents=True, exist_ok=True)
     config.KB_DIR.mkdir(parents=True, exist_ok=True)
 
-    out1 = config.KB_DIR / "sbc1101_chunks.jsonl"
-    out2 = config.KB_DIR / "res_requirements_chunks.jsonl"
-    out_all = config.KB_DIR / "kb_all_chunks.jsonl"
-
-    build_kb_from_md(
-        md_path=config.OCR_DIR / "sbc1101_ocr.md",
-        out_jsonl_path=out1,
-        doc_id="SBC1101",
-        source="SBC1101_MISTRAL_OCR",
-    )
+    outs = [config.KB_DIR / d["out"] for d in KB_DOCS]
+    out_all = config.KB_ALL_PATH
 
-    build_kb_from_md(
-        md_path=config.OCR_DIR / "res_requirements_ocr.md",
-        out_jsonl_path=out2,
-        doc_id="RES_REQUIREMENTS",
-        source="RES_REQUIREMENTS_MISTRAL_OCR",
-    )
+    for spec, out in zip(KB_DOCS, outs):
+        build_kb_from_md(
+            md_path=config.OCR_DIR / spec["md"],
+            out_jsonl_path=out,
+            doc_id=spec["doc_id"],
+            source=spec["source"],
+            binary_path=binary_path_for(out),
+        )
 
-    _concat_jsonl(out_all, [out1, out2])
+    _concat_jsonl(out_all, outs)
 
     assert out_all.exists() and out_all.stat().st_size > 0
+
+    build_binaries([out_all])
     # marker file (only if everything above succeeded)
-    (config.KB_DIR / ".built").write_text("ok", encoding="utf-8")
+    config.KB_BUILT_MARKER.write_text("ok", encoding="utf-8")
+
+    info = build_evidence_table()
+    print(f"evidence table: {info['rules']} rules -> {info['out_path']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,231 @@
+# scripts/ingest_kb.py
+"""
+Incremental KB ingestion.
+
+Only OCR markdown files whose content hash changed (or whose segment file was
+modified/removed) are re-chunked. Chunk ids are stable: a chunk whose
+(section, text) already existed in the doc's previous segment keeps its id,
+new chunks get ids that were never used before for that doc.
+
+Each write goes to a temp file and is moved into place with os.replace:
+per-doc segments first (each JSONL before its .bin, which records the
+JSONL's hash), then kb_all, then the manifest, and the `.built` marker last.
+The marker only says a build has completed at least once (`config.kb_ready`);
+the kb_version it carries is informational. The runtime identifies KB files
+by content hash, not through the marker.
+
+Limitation: an ingest is NOT an atomic switch of the whole KB. Each file is
+replaced atomically, but a process that loads the KB while an ingest runs
+can see new segments next to the old kb_all (a changed per-doc file then
+no longer matches a range of kb_all and is served on its own), and the
+evidence table is rewritten only after the marker. Results are consistent
+again once the ingest and the evidence table are done. Run it while
+workers are stopped, or ingest into a copy of `data/kb` and swap the
+directory (e.g. a symlink rename) before restarting the workers.
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from compliance_rag import config
+from compliance_rag.evidence_table import build_evidence_table
+from compliance_rag.kb_binary import binary_path_for, write_kb_binary
+from scripts.build_kb_all import KB_DOCS
+from scripts.kb_build_from_md import iter_blocks, iter_chunks, iter_md_lines, write_jsonl_file
+
+MANIFEST_VERSION = 1
+
+
+def _sha256_file(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _chunk_key(ch: Dict[str, Any]) -> str:
+    data = f"{ch.get('section') or ''}\0{ch.get('text') or ''}".encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _replace_text(path: Path, lines: Iterable[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line)
+    os.replace(tmp, path)
+
+
+class _StableIds:
+    """Reuse the ids of unchanged chunks; new chunks get never-used ids."""
+
+    def __init__(self, previous: List[Dict[str, Any]], next_id: int) -> None:
+        self.next_id = next_id
+        self._pool: Dict[str, List[int]] = {}
+        for ch in reversed(previous):
+            self._pool.setdefault(_chunk_key(ch), []).append(ch["chunk_id"])
+
+    def assign(self, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for ch in chunks:
+            ids = self._pool.get(_chunk_key(ch))
+            if ids:
+                ch["chunk_id"] = ids.pop()
+            else:
+                ch["chunk_id"] = self.next_id
+                self.next_id += 1
+            yield ch
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    if path.exists():
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    return {"version": MANIFEST_VERSION, "docs": {}}
+
+
+def ingest(
+    docs: Optional[List[Dict[str, str]]] = None,
+    *,
+    kb_dir: Path = config.KB_DIR,
+    ocr_dir: Path = config.OCR_DIR,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Bring the KB in `kb_dir` up to date with the OCR markdown in `ocr_dir`.
+
+    `docs` are doc specs ({doc_id, source, md, out}) to register on top of the
+    ones already in the manifest (default: KB_DOCS).
+    """
+    kb_dir, ocr_dir = Path(kb_dir), Path(ocr_dir)
+    manifest_path = kb_dir / config.KB_MANIFEST_PATH.name
+    kb_all_path = kb_dir / config.KB_ALL_PATH.name
+    marker_path = kb_dir / config.KB_BUILT_MARKER.name
+
+    manifest = _load_manifest(manifest_path)
+    state: Dict[str, Dict[str, Any]] = manifest["docs"]
+
+    for spec in docs if docs is not None else KB_DOCS:
+        entry = state.setdefault(spec["doc_id"], {})
+        entry.update({k: spec[k] for k in ("source", "md", "out")})
+
+    changed: List[str] = []
+
+    for doc_id, entry in state.items():
+        md_path = ocr_dir / entry["md"]
+        seg_path = kb_dir / entry["out"]
+
+        md_hash = _sha256_file(md_path)
+        if md_hash is None:
+            raise FileNotFoundError(f"{doc_id}: OCR markdown not found: {md_path}")
+
+        seg_hash = _sha256_file(seg_path)
+        up_to_date = (
+            seg_hash is not None
+            and entry.get("md_sha256") == md_hash
+            and entry.get("segment_sha256") == seg_hash
+            and binary_path_for(seg_path).exists()
+        )
+        if up_to_date and not force:
+            continue
+
+        previous = _read_jsonl(seg_path)
+        next_id = max(
+            int(entry.get("next_chunk_id", 0)),
+            max((int(ch["chunk_id"]) for ch in previous), default=-1) + 1,
+        )
+
+        ids = _StableIds(previous, next_id)
+        chunks = ids.assign(
+            iter_chunks(iter_blocks(iter_md_lines(md_path)), doc_id=doc_id, source=entry["source"])
+        )
+
+        # one streaming pass: chunker -> JSONL segment -> binary segment
+        # (the JSONL is replaced before the binary is written)
+        n_chunks = write_kb_binary(
+            write_jsonl_file(chunks, seg_path), binary_path_for(seg_path), source=seg_path,
+        )["chunks"]
+
+        entry.update({
+            "md_sha256": md_hash,
+            "segment_sha256": _sha256_file(seg_path),
+            "next_chunk_id": ids.next_id,
+            "chunks": n_chunks,
+        })
+        changed.append(doc_id)
+
+    if changed or not kb_all_path.exists() or not binary_path_for(kb_all_path).exists():
+        # kb_all is a concatenation of the segments (no re-chunking)
+        segments = [kb_dir / entry["out"] for entry in state.values()]
+
+        def all_lines() -> Iterable[str]:
+            for seg in segments:
+                with seg.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            yield line
+
+        _replace_text(kb_all_path, all_lines())
+        write_kb_binary(
+            (json.loads(line) for line in all_lines()),
+            binary_path_for(kb_all_path),
+            source=kb_all_path,
+        )
+
+    kb_version = hashlib.sha256(
+        json.dumps(
+            {doc_id: entry["segment_sha256"] for doc_id, entry in state.items()},
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()
+    manifest["kb_version"] = kb_version
+
+    _replace_text(manifest_path, [json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"])
+    _replace_text(marker_path, [json.dumps({"kb_version": kb_version, "manifest": manifest_path.name}) + "\n"])
+
+    return {"changed": changed, "kb_version": kb_version, "docs": len(state)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally ingest OCR markdown into the KB.")
+    parser.add_argument("--force", action="store_true", help="re-chunk every document")
+    parser.add_argument("--add", metavar="MD", help="register a new OCR markdown file (path relative to OCR_DIR or absolute)")
+    parser.add_argument("--doc-id", help="doc_id for --add")
+    parser.add_argument("--source", help="source label for --add (default: <DOC_ID>_MISTRAL_OCR)")
+    args = parser.parse_args()
+
+    docs = list(KB_DOCS)
+    if args.add:
+        if not args.doc_id:
+            parser.error("--add requires --doc-id")
+        docs.append({
+            "doc_id": args.doc_id,
+            "source": args.source or f"{args.doc_id}_MISTRAL_OCR",
+            "md": args.add,
+            "out": f"{args.doc_id.lower()}_chunks.jsonl",
+        })
+
+    info = ingest(docs, force=args.force)
+    changed = ", ".join(info["changed"]) or "none"
+    print(f"{info['docs']} docs, changed: {changed}, kb_version {info['kb_version'][:12]}")
+
+    table = build_evidence_table()
+    print(f"evidence table: {table['rules']} rules -> {table['out_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 #This script shows how the Markdown OCR output was chunked into a KB (JSONL).
+import os
 import re
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional
 from typing import Union
 
+from compliance_rag.kb_binary import write_kb_binary
+from compliance_rag.normalize import NORMALIZER_VERSION, tokenize_with_offsets
+from compliance_rag.text_picker import SENTENCE_VERSION, sentence_spans
+
 PAGE_RE = re.compile(
     r"(?:^|\n)\s*(?:Page|PAGE|الصفحة)\s*[:\-]?\s*(\d+)\s*(?:\n|$)",
     re.IGNORECASE,
@@ -17,40 +22,32 @@ MIN_BLOCK_LEN = 20
 MIN_CHUNK_LEN = 20
 
 
-def normalize_arabic(text: str) -> str:
-    """Light Arabic normalization for search/indexing."""
-    text = re.sub(r"\s+", " ", text).strip()
-    text = re.sub("[إأآٱ]", "ا", text)
-    text = re.sub("ى", "ي", text)
-    text = re.sub("ؤ", "و", text)
-    text = re.sub("ئ", "ي", text)
-    text = re.sub("ة", "ه", text)
-    text = re.sub("[ًٌٍَُِّْـ]", "", text)
-    return text
+def iter_md_lines(md_path: Union[str, Path]) -> Iterator[str]:
+    """Stream a Markdown file line by line (same split as str.splitlines())."""
+    with Path(md_path).open("r", encoding="utf-8") as f:
+        for line in f:
+            # a file line can still hold \v, \f, \u2028 ... which splitlines() breaks on
+            yield from line.splitlines() or [""]
 
 
-def md_to_chunks(
-    md_text: str,
-    *,
-    doc_id: str,
-    source: str,
-    max_chars: int = 1200,
-    overlap_chars: int = 150,
-) -> List[Dict[str, Any]]:
+def _make_block(title: Optional[str], lines: List[str], page: Optional[int]) -> Optional[Dict[str, Any]]:
+    block_text = "\n".join(lines).strip()
+    if len(block_text) < MIN_BLOCK_LEN:
+        return None
+    return {"title": title, "text": block_text, "page": page}
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
     """
-    Convert a Markdown document into overlapping text chunks.
-    Headings (Markdown or SBC-style numeric headings) define sections.
+    Group lines into heading-delimited blocks {title, text, page}.
+    Only the current block is held in memory.
     """
-    chunks: List[Dict[str, Any]] = []
-    chunk_id = 0
     current_page: Optional[int] = None
-
-    blocks: List[Dict[str, Any]] = []
     current_title: Optional[str] = None
     current_lines: List[str] = []
     block_page: Optional[int] = None
 
-    for raw_line in md_text.splitlines():
+    for raw_line in lines:
         stripped = raw_line.strip()
 
         m_page = PAGE_RE.search(raw_line)
@@ -67,15 +64,9 @@ def md_to_chunks(
 
         if m_md or m_sbc:
             if current_lines:
-                block_text = "\n".join(current_lines).strip()
-                if len(block_text) >= MIN_BLOCK_LEN:
-                    blocks.append(
-                        {
-                            "title": current_title,
-                            "text": block_text,
-                            "page": block_page,
-                        }
-                    )
+                blk = _make_block(current_title, current_lines, block_page)
+                if blk is not None:
+                    yield blk
                 current_lines = []
 
             current_title = m_md.group(2).strip() if m_md else m_sbc.group(2).strip()
@@ -87,15 +78,40 @@ def md_to_chunks(
             current_lines.append(raw_line)
 
     if current_lines:
-        block_text = "\n".join(current_lines).strip()
-        if len(block_text) >= MIN_BLOCK_LEN:
-            blocks.append(
-                {
-                    "title": current_title,
-                    "text": block_text,
-                    "page": block_page,
-                }
-            )
+        blk = _make_block(current_title, current_lines, block_page)
+        if blk is not None:
+            yield blk
+
+
+def _make_chunk(doc_id: str, source: str, chunk_id: int, page: Optional[int], section: str, text: str) -> Dict[str, Any]:
+    # No `text_norm`: the runtime never reads it (FilterIndex normalizes
+    # section/text once per loaded KB, records and .bin drop the field).
+    tokens, token_starts = tokenize_with_offsets(text)
+    return {
+        "doc_id": doc_id,
+        "source": source,
+        "chunk_id": chunk_id,
+        "page": page,
+        "section": section,
+        "text": text,
+        "tokens": tokens,
+        "token_starts": token_starts,
+        "norm_version": NORMALIZER_VERSION,
+        "sentences": [[a, b, int(o)] for a, b, o in sentence_spans(text)],
+        "sent_version": SENTENCE_VERSION,
+    }
+
+
+def iter_chunks(
+    blocks: Iterable[Dict[str, Any]],
+    *,
+    doc_id: str,
+    source: str,
+    max_chars: int = 1200,
+    overlap_chars: int = 150,
+) -> Iterator[Dict[str, Any]]:
+    """Split blocks into overlapping chunks, numbering them in order."""
+    chunk_id = 0
 
     for blk in blocks:
         text = re.sub(r"```.*?```", "", blk["text"], flags=re.DOTALL).strip()
@@ -107,17 +123,7 @@ def md_to_chunks(
 
         if len(text) <= max_chars:
             if len(text) >= MIN_CHUNK_LEN:
-                chunks.append(
-                    {
-                        "doc_id": doc_id,
-                        "source": source,
-                        "chunk_id": chunk_id,
-                        "page": page,
-                        "section": section,
-                        "text": text,
-                        "text_norm": normalize_arabic(text),
-                    }
-                )
+                yield _make_chunk(doc_id, source, chunk_id, page, section, text)
                 chunk_id += 1
             continue
 
@@ -126,24 +132,61 @@ def md_to_chunks(
             end = min(len(text), start + max_chars)
             piece = text[start:end].strip()
             if len(piece) >= MIN_CHUNK_LEN:
-                chunks.append(
-                    {
-                        "doc_id": doc_id,
-                        "source": source,
-                        "chunk_id": chunk_id,
-                        "page": page,
-                        "section": section,
-                        "text": piece,
-                        "text_norm": normalize_arabic(piece),
-                    }
-                )
+                yield _make_chunk(doc_id, source, chunk_id, page, section, piece)
                 chunk_id += 1
 
             if end == len(text):
                 break
             start = max(0, end - overlap_chars)
 
-    return chunks
+
+def md_to_chunks(
+    md_text: str,
+    *,
+    doc_id: str,
+    source: str,
+    max_chars: int = 1200,
+    overlap_chars: int = 150,
+) -> List[Dict[str, Any]]:
+    """
+    Convert a Markdown document into overlapping text chunks.
+    Headings (Markdown or SBC-style numeric headings) define sections.
+    """
+    return list(
+        iter_chunks(
+            iter_blocks(md_text.splitlines()),
+            doc_id=doc_id,
+            source=source,
+            max_chars=max_chars,
+            overlap_chars=overlap_chars,
+        )
+    )
+
+
+def write_jsonl(chunks: Iterable[Dict[str, Any]], f: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Write each chunk as a JSONL line and pass it on (to chain more consumers)."""
+    for ch in chunks:
+        f.write(json.dumps(ch, ensure_ascii=False) + "\n")
+        yield ch
+
+
+def write_jsonl_file(chunks: Iterable[Dict[str, Any]], path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Like `write_jsonl`, into a temp file that is closed and moved onto `path`
+    before the iterator ends, so a consumer that exhausts it (the binary
+    writer) sees the finished JSONL.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            yield from write_jsonl(chunks, f)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+
 
 def build_kb_from_md(
     md_path: Union[str, Path],
@@ -151,17 +194,24 @@ def build_kb_from_md(
     *,
     doc_id: str,
     source: str,
+    binary_path: Optional[Union[str, Path]] = None,
 ) -> Dict[str, Any]:
-    """Build a JSONL knowledge base from a Markdown file."""
-    md_path = Path(md_path)
+    """
+    Build a JSONL knowledge base from a Markdown file.
+
+    Streams lines -> blocks -> chunks -> writer, so memory is bounded by the
+    largest section rather than the file. With `binary_path`, the binary KB
+    (token ids + index columns) is built from the same stream.
+    """
     out_path = Path(out_jsonl_path)
 
-    md = md_path.read_text(encoding="utf-8")
-    chunks = md_to_chunks(md, doc_id=doc_id, source=source)
+    chunks = iter_chunks(iter_blocks(iter_md_lines(md_path)), doc_id=doc_id, source=source)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        for ch in chunks:
-            f.write(json.dumps(ch, ensure_ascii=False) + "\n")
+    # the JSONL is complete and in place before the binary records its signature
+    written = write_jsonl_file(chunks, out_path)
+    if binary_path is not None:
+        n = write_kb_binary(written, binary_path, source=out_path)["chunks"]
+    else:
+        n = sum(1 for _ in written)
 
-    return {"chunks": len(chunks), "out_path": str(out_path)}
+    return {"chunks": n, "out_path": str(out_path)}
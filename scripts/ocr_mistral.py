@@ -1,8 +1,12 @@
 #This script shows how PDFs were converted to Markdown using Mistral OCR.
 import os
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from mistralai import Mistral
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 ENV_PATH = ROOT_DIR / ".env"
@@ -32,3 +36,42 @@ def run_ocr(pdf_path: str, out_md: str) -> None:
     md_text = "\n\n".join(p.markdown for p in res.pages)
     Path(out_md).parent.mkdir(parents=True, exist_ok=True)
     Path(out_md).write_text(md_text, encoding="utf-8")
+
+
+class MistralOCRClient:
+    """OCR client for scripts.ocr_pipeline: uploads each PDF once, OCRs page lists."""
+
+    def __init__(self, mistral: Mistral = client, model: str = MODEL_NAME) -> None:
+        self.mistral = mistral
+        self.model = model
+        self._file_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _file_id(self, pdf_path: Path) -> str:
+        key = str(pdf_path)
+        with self._lock:
+            if key not in self._file_ids:
+                with open(pdf_path, "rb") as f:
+                    uploaded = self.mistral.files.upload(
+                        file={"file_name": Path(pdf_path).name, "content": f},
+                        purpose="ocr",
+                    )
+                self._file_ids[key] = uploaded.id
+            return self._file_ids[key]
+
+    def page_count(self, pdf_path: Path) -> Optional[int]:
+        """/Count of the PDF's page tree root; None if the file cannot be parsed."""
+        try:
+            reader = PdfReader(str(pdf_path))
+            return int(reader.trailer["/Root"]["/Pages"]["/Count"])
+        except (PdfReadError, KeyError, TypeError, ValueError):
+            return None
+
+    def ocr_pages(self, pdf_path: Path, pages: Optional[List[int]]) -> List[str]:
+        kwargs = {} if pages is None else {"pages": pages}
+        res = self.mistral.ocr.process(
+            model=self.model,
+            document={"type": "file", "file_id": self._file_id(pdf_path)},
+            **kwargs,
+        )
+        return [p.markdown for p in sorted(res.pages, key=lambda p: p.index)]
@@ -0,0 +1,204 @@
+# scripts/ocr_pipeline.py
+"""
+Concurrent, resumable OCR driver.
+
+PDFs are split into page ranges that run on a bounded thread pool (across all
+documents at once). Every OCR'd page is checkpointed to
+`<checkpoint_dir>/<pdf sha256>/page_00001.md`, so an interrupted or partly
+failed run only redoes the missing pages. PDFs whose hash already has a
+finished output (recorded in the OCR manifest) are skipped.
+
+The OCR backend is any object with:
+    page_count(pdf_path) -> Optional[int]          (None = unknown)
+    ocr_pages(pdf_path, pages) -> List[str]        (markdown per page, in order;
+                                                    pages=None means all pages)
+`scripts.ocr_mistral.MistralOCRClient` is the production one;
+`scripts.ocr_stub.StubOCRClient` runs the pipeline locally (tests/).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from compliance_rag import config
+
+CHECKPOINT_DIR = config.OCR_DIR / ".checkpoints"
+OCR_MANIFEST_PATH = config.OCR_DIR / "ocr_manifest.json"
+
+
+class OCRClient(Protocol):
+    def page_count(self, pdf_path: Path) -> Optional[int]: ...
+
+    def ocr_pages(self, pdf_path: Path, pages: Optional[List[int]]) -> List[str]: ...
+
+
+@dataclass
+class OCRJob:
+    pdf_path: Path
+    out_md: Path
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _page_file(ckpt_dir: Path, page: int) -> Path:
+    return ckpt_dir / f"page_{page:05d}.md"
+
+
+def _with_retries(fn, *, retries: int, backoff: float):
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+
+class _DocState:
+    """Progress of one PDF: which page-range tasks are still outstanding."""
+
+    def __init__(self, job: OCRJob, sha: str, ckpt_dir: Path, n_pages: Optional[int]) -> None:
+        self.job = job
+        self.sha = sha
+        self.ckpt_dir = ckpt_dir
+        self.n_pages = n_pages
+        self.pending = 0
+        self.error: Optional[BaseException] = None
+
+
+def run_ocr_jobs(
+    jobs: List[OCRJob],
+    client: OCRClient,
+    *,
+    max_workers: int = 4,
+    pages_per_task: int = 20,
+    retries: int = 3,
+    backoff: float = 2.0,
+    checkpoint_dir: Path = CHECKPOINT_DIR,
+    manifest_path: Path = OCR_MANIFEST_PATH,
+) -> Dict[str, Any]:
+    """
+    OCR every job's PDF into its markdown file.
+
+    Returns {"done": [pdf...], "skipped": [pdf...], "failed": {pdf: error}}.
+    A failed document keeps its page checkpoints; rerunning resumes it.
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    manifest_path = Path(manifest_path)
+    manifest: Dict[str, Any] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest_lock = threading.Lock()
+
+    summary: Dict[str, Any] = {"done": [], "skipped": [], "failed": {}}
+    docs: List[_DocState] = []
+    tasks: List[Tuple[_DocState, Optional[List[int]]]] = []
+
+    for job in jobs:
+        pdf_path, out_md = Path(job.pdf_path), Path(job.out_md)
+        sha = _sha256_file(pdf_path)
+
+        prev = manifest.get(sha)
+        if prev and Path(prev["out_md"]).exists():
+            if Path(prev["out_md"]) != out_md:
+                _write_atomic(out_md, Path(prev["out_md"]).read_text(encoding="utf-8"))
+            summary["skipped"].append(str(pdf_path))
+            continue
+
+        try:
+            n_pages = _with_retries(lambda: client.page_count(pdf_path), retries=retries, backoff=backoff)
+        except Exception as e:
+            summary["failed"][str(pdf_path)] = repr(e)
+            continue
+
+        doc = _DocState(OCRJob(pdf_path, out_md), sha, checkpoint_dir / sha, n_pages)
+        docs.append(doc)
+
+        if n_pages is None:
+            tasks.append((doc, None))
+        else:
+            for start in range(0, n_pages, max(1, pages_per_task)):
+                tasks.append((doc, list(range(start, min(n_pages, start + pages_per_task)))))
+
+    def run_task(doc: _DocState, pages: Optional[List[int]]) -> None:
+        if pages is not None:
+            pages = [p for p in pages if not _page_file(doc.ckpt_dir, p).exists()]
+            if not pages:
+                return
+        elif (doc.ckpt_dir / "complete").exists():
+            return
+
+        texts = _with_retries(lambda: client.ocr_pages(doc.job.pdf_path, pages), retries=retries, backoff=backoff)
+        if pages is not None and len(texts) != len(pages):
+            raise RuntimeError(f"OCR returned {len(texts)} pages for {len(pages)} requested")
+
+        for page, text in zip(pages if pages is not None else range(len(texts)), texts):
+            _write_atomic(_page_file(doc.ckpt_dir, page), text)
+        if pages is None:
+            doc.n_pages = len(texts)
+            _write_atomic(doc.ckpt_dir / "complete", str(len(texts)))
+
+    def finish(doc: _DocState) -> None:
+        n_pages = doc.n_pages
+        if n_pages is None:
+            n_pages = int((doc.ckpt_dir / "complete").read_text())
+        pages = [_page_file(doc.ckpt_dir, p).read_text(encoding="utf-8") for p in range(n_pages)]
+        _write_atomic(doc.job.out_md, "\n\n".join(pages))
+
+        with manifest_lock:
+            manifest[doc.sha] = {"pdf": str(doc.job.pdf_path), "out_md": str(doc.job.out_md), "pages": n_pages}
+            _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+
+        if doc.ckpt_dir.exists():
+            for f in doc.ckpt_dir.glob("*"):
+                f.unlink()
+            doc.ckpt_dir.rmdir()
+
+    def complete(doc: _DocState) -> None:
+        if doc.error is None:
+            try:
+                finish(doc)
+            except Exception as e:
+                doc.error = e
+        if doc.error is not None:
+            summary["failed"][str(doc.job.pdf_path)] = repr(doc.error)
+        else:
+            summary["done"].append(str(doc.job.pdf_path))
+
+    for doc, _ in tasks:
+        doc.pending += 1
+    for doc in docs:
+        if doc.pending == 0:
+            complete(doc)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(run_task, doc, pages): doc for doc, pages in tasks}
+        for fut in as_completed(futures):
+            doc = futures[fut]
+            doc.pending -= 1
+            if fut.exception() is not None and doc.error is None:
+                doc.error = fut.exception()
+            if doc.pending == 0:
+                complete(doc)
+
+    return summary
@@ -0,0 +1,50 @@
+# scripts/ocr_stub.py
+"""
+Local OCR backend for scripts.ocr_pipeline (no network, no API key).
+
+The "PDF" is a UTF-8 text file whose pages are separated by form feeds
+(\\f); OCR returns each page's text unchanged. `fail` injects errors: each
+(pdf name, page) in it raises on its first request, so retries and
+resumption can be exercised.
+"""
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+class StubOCRClient:
+    """OCR client reading form-feed separated text files; records every call."""
+
+    def __init__(self, fail: Iterable[Tuple[str, int]] = (), *, known_pages: bool = True) -> None:
+        self.known_pages = known_pages
+        self.calls: List[Tuple[str, Optional[List[int]]]] = []
+        self._fail: Set[Tuple[str, int]] = set(fail)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pages(pdf_path: Path) -> List[str]:
+        return Path(pdf_path).read_text(encoding="utf-8").split("\f")
+
+    def page_count(self, pdf_path: Path) -> Optional[int]:
+        return len(self._pages(pdf_path)) if self.known_pages else None
+
+    def ocr_pages(self, pdf_path: Path, pages: Optional[List[int]]) -> List[str]:
+        name = Path(pdf_path).name
+        texts = self._pages(pdf_path)
+        wanted = list(range(len(texts))) if pages is None else pages
+        with self._lock:
+            self.calls.append((name, pages))
+            failing = [p for p in wanted if (name, p) in self._fail]
+            self._fail.difference_update((name, p) for p in failing)
+        if failing:
+            raise RuntimeError(f"stub OCR failure: {name} pages {failing}")
+        return [texts[p] for p in wanted]
+
+
+def write_stub_pdf(path: Path, pages: List[str]) -> Path:
+    """Write a stub "PDF" with the given page texts."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\f".join(pages), encoding="utf-8")
+    return path
+
@@ -1,18 +1,30 @@
 # scripts/run_all_ocr.py
 from compliance_rag import config
-from scripts.ocr_mistral import run_ocr
+from scripts.ocr_pipeline import OCRJob, run_ocr_jobs
 
 
 def main() -> None:
-    run_ocr(
-        pdf_path=str(config.DATA_DIR / "pdf" / "sbc1101.pdf"),
-        out_md=str(config.OCR_DIR / "sbc1101_ocr.md"),
-    )
+    # imported here: creating the Mistral client requires MISTRAL_API_KEY
+    from scripts.ocr_mistral import MistralOCRClient
 
-    run_ocr(
-        pdf_path=str(config.DATA_DIR / "pdf" / "اشتراطات إنشاء المباني السكنية.pdf"),
-        out_md=str(config.OCR_DIR / "res_requirements_ocr.md"),
-    )
+    jobs = [
+        OCRJob(
+            pdf_path=config.DATA_DIR / "pdf" / "sbc1101.pdf",
+            out_md=config.OCR_DIR / "sbc1101_ocr.md",
+        ),
+        OCRJob(
+            pdf_path=config.DATA_DIR / "pdf" / "اشتراطات إنشاء المباني السكنية.pdf",
+            out_md=config.OCR_DIR / "res_requirements_ocr.md",
+        ),
+    ]
+
+    summary = run_ocr_jobs(jobs, MistralOCRClient())
+    for pdf in summary["skipped"]:
+        print(f"skipped (already OCR'd): {pdf}")
+    for pdf in summary["done"]:
+        print(f"done: {pdf}")
+    for pdf, err in summary["failed"].items():
+        print(f"FAILED (rerun to resume): {pdf}: {err}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import importlib
+import random
+
+import pytest
+
+from compliance_rag import bm25
+from compliance_rag.bm25 import BM25Index
+from compliance_rag.filters import FilterIndex
+
+retrieval = importlib.import_module("compliance_rag.retrieval")
+
+_WORDS = [f"w{i}" for i in range(40)]
+_SECTIONS = ["غرف النوم", "دورات المياه", "المطابخ", "الممرات", "اشتراطات عامة"]
+
+
+def _corpus(rng, n_docs):
+    chunks, docs_tokens = [], []
+    for i in range(n_docs):
+        # skewed word frequencies, so some tokens hit most docs and some few
+        toks = [rng.choice(_WORDS[: rng.randint(3, len(_WORDS))]) for _ in range(rng.randint(0, 30))]
+        chunks.append({"chunk_id": i, "section": rng.choice(_SECTIONS), "text": " ".join(toks)})
+        docs_tokens.append(toks)
+    return chunks, docs_tokens
+
+
+def _queries(rng, n):
+    return [[rng.choice(_WORDS + ["unknown"]) for _ in range(rng.randint(1, 5))] for _ in range(n)]
+
+
+def _filter_kwargs(rng):
+    kwargs = {}
+    if rng.random() < 0.4:
+        kwargs["section_hint"] = rng.choice(_SECTIONS)
+    if rng.random() < 0.3:
+        kwargs["exclude_hints"] = rng.sample(_SECTIONS, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        kwargs["must_include_all"] = rng.sample(_WORDS, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        kwargs["must_include_any"] = rng.sample(_WORDS, rng.randint(1, 3))
+    return kwargs
+
+
+def _candidate_sets(rng, filters, n_docs):
+    yield None
+    lo = rng.randint(0, n_docs)
+    hi = rng.randint(lo, n_docs)
+    yield range(lo, hi)
+    yield list(range(lo, hi))
+    yield sorted(rng.sample(range(n_docs), rng.randint(0, n_docs)))
+    for _ in range(6):
+        yield filters.candidates(**_filter_kwargs(rng))
+
+
+def _backends():
+    backends = ["python"]
+    if bm25.np is not None:
+        backends.append("numpy")
+    return backends
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_backends_match_subset_reference(seed):
+    rng = random.Random(seed)
+    n_docs = rng.randint(1, 120)
+    chunks, docs_tokens = _corpus(rng, n_docs)
+    indexes = {name: BM25Index(docs_tokens, backend=name) for name in _backends()}
+    filters = FilterIndex(chunks, indexes["python"])
+    queries = _queries(rng, 8)
+
+    for candidates in _candidate_sets(rng, filters, n_docs):
+        ids = list(range(n_docs)) if candidates is None else list(candidates)
+        for q in queries:
+            ref = retrieval._bm25_rank(q, [docs_tokens[i] for i in ids])
+            expected = {ids[j]: s for j, s in enumerate(ref) if s > 0}
+            assert indexes["python"].score(q, candidates) == expected
+
+            min_score = rng.choice((0.0, 0.5))
+            k = rng.randint(1, 10)
+            want_hits = [(i, expected.get(i, 0.0)) for i in ids if expected.get(i, 0.0) >= min_score]
+            want_top = sorted(want_hits, key=lambda x: (-x[1], x[0]))[:k]
+            for name, index in indexes.items():
+                assert index.hits(q, candidates, min_score) == want_hits, name
+                assert index.top_k(q, k, candidates, min_score) == want_top, name
+
+        for name, index in indexes.items():
+            many = index.top_k_many(queries, 3, candidates)
+            assert many == [index.top_k(q, 3, candidates) for q in queries], name
@@ -0,0 +1,58 @@
+import random
+import re
+
+from compliance_rag.normalize import normalize_arabic, tokenize, tokenize_with_offsets
+
+
+def _reference_normalize(text):
+    """The step-by-step normalizer the fused one replaced."""
+    text = (text or "").translate(str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789"))
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    text = re.sub("[إأآٱ]", "ا", text)
+    text = re.sub("ى", "ي", text)
+    text = re.sub("ؤ", "و", text)
+    text = re.sub("ئ", "ي", text)
+    text = re.sub("ة", "ه", text)
+    text = re.sub("[ًٌٍَُِّْـ]", "", text)
+    return text
+
+
+def _reference_tokenize(text):
+    return re.findall(r"[a-z0-9\u0600-\u06ff]+", _reference_normalize(text))
+
+
+_ALPHABET = (
+    "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    "إأآٱىؤئةء"
+    "ًٌٍَُِّْـ"
+    "٠١٢٣٤٥٦٧٨٩0123456789"
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZİÉß"
+    " \t\n\r\f\v  　\x1c"
+    ".,:;-–()/%²×،؛؟"
+)
+
+
+def _random_strings(seed, n=3000):
+    rng = random.Random(seed)
+    for _ in range(n):
+        # mostly short strings (hints, keywords: the memoized path), some long chunks
+        length = rng.choice((rng.randint(0, 12), rng.randint(0, 64), rng.randint(65, 400)))
+        yield "".join(rng.choice(_ALPHABET) for _ in range(length))
+
+
+def test_normalize_matches_reference():
+    for text in _random_strings(18):
+        assert normalize_arabic(text) == _reference_normalize(text), repr(text)
+
+
+def test_tokenize_matches_reference():
+    for text in _random_strings(19):
+        expected = _reference_tokenize(text)
+        assert tokenize(text) == expected, repr(text)
+        assert tokenize_with_offsets(text)[0] == expected, repr(text)
+
+
+def test_memoized_short_results_are_not_shared():
+    toks = tokenize("غرفة نوم")
+    toks.append("x")
+    assert tokenize("غرفة نوم") == ["غرفه", "نوم"]
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from scripts.ocr_pipeline import OCRJob, run_ocr_jobs
+from scripts.ocr_stub import StubOCRClient, write_stub_pdf
+
+
+def _run(tmp_path: Path, jobs, client, **kwargs):
+    return run_ocr_jobs(
+        jobs,
+        client,
+        retries=kwargs.pop("retries", 0),
+        backoff=0.0,
+        checkpoint_dir=tmp_path / "ckpt",
+        manifest_path=tmp_path / "manifest.json",
+        **kwargs,
+    )
+
+
+def _doc(tmp_path: Path, name: str, n_pages: int):
+    pages = [f"{name} page {p}" for p in range(n_pages)]
+    pdf = write_stub_pdf(tmp_path / "pdf" / f"{name}.pdf", pages)
+    return OCRJob(pdf, tmp_path / "ocr" / f"{name}.md"), "\n\n".join(pages)
+
+
+def test_pages_are_split_into_ranges_and_joined_in_order(tmp_path):
+    job, expected = _doc(tmp_path, "a", 45)
+    client = StubOCRClient()
+
+    summary = _run(tmp_path, [job], client, pages_per_task=20)
+
+    assert summary["done"] == [str(job.pdf_path)]
+    assert sorted(pages[0] for _, pages in client.calls) == [0, 20, 40]
+    assert job.out_md.read_text(encoding="utf-8") == expected
+    assert list((tmp_path / "ckpt").iterdir()) == []
+
+
+def test_finished_pdf_is_skipped(tmp_path):
+    job, _ = _doc(tmp_path, "a", 5)
+    _run(tmp_path, [job], StubOCRClient())
+
+    client = StubOCRClient()
+    summary = _run(tmp_path, [job], client)
+
+    assert summary["skipped"] == [str(job.pdf_path)]
+    assert client.calls == []
+
+
+def test_failed_range_resumes_from_checkpoints(tmp_path):
+    job, expected = _doc(tmp_path, "a", 30)
+    other, other_expected = _doc(tmp_path, "b", 12)
+
+    first = _run(tmp_path, [job, other], StubOCRClient(fail=[("a.pdf", 25)]), pages_per_task=10)
+    assert list(first["failed"]) == [str(job.pdf_path)]
+    assert first["done"] == [str(other.pdf_path)]
+    assert not job.out_md.exists()
+
+    client = StubOCRClient()
+    second = _run(tmp_path, [job, other], client, pages_per_task=10)
+
+    assert second["done"] == [str(job.pdf_path)]
+    assert second["skipped"] == [str(other.pdf_path)]
+    assert client.calls == [("a.pdf", list(range(20, 30)))]
+    assert job.out_md.read_text(encoding="utf-8") == expected
+    assert other.out_md.read_text(encoding="utf-8") == other_expected
+
+
+def test_retries_recover_transient_failures(tmp_path):
+    job, expected = _doc(tmp_path, "a", 8)
+    client = StubOCRClient(fail=[("a.pdf", 3)])
+
+    summary = _run(tmp_path, [job], client, pages_per_task=4, retries=1)
+
+    assert summary["done"] == [str(job.pdf_path)]
+    assert job.out_md.read_text(encoding="utf-8") == expected
+
+
+def test_unknown_page_count_runs_whole_document(tmp_path):
+    job, expected = _doc(tmp_path, "a", 7)
+    client = StubOCRClient(known_pages=False)
+
+    summary = _run(tmp_path, [job], client)
+
+    assert summary["done"] == [str(job.pdf_path)]
+    assert client.calls == [("a.pdf", None)]
+    assert job.out_md.read_text(encoding="utf-8") == expected
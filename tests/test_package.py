@@ -0,0 +1,22 @@
+import importlib
+
+
+def test_documented_building_imports():
+    from compliance_rag import analyze_building, iter_building_results, shutdown_executors
+    from compliance_rag.analyze_building import shared_executor
+    from compliance_rag.analyze_building import iter_building_results as iter_from_module
+
+    module = importlib.import_module("compliance_rag.analyze_building")
+    assert analyze_building is module.analyze_building
+    assert iter_building_results is iter_from_module is module.iter_building_results
+    assert shutdown_executors is module.shutdown_executors
+    assert callable(shared_executor)
+
+
+def test_documented_entrypoint_imports():
+    from compliance_rag import analyze_plan, analyze_plan_async, warmup
+    from compliance_rag.analyze_plan import analyze_plan as analyze_from_module
+    from compliance_rag.batch import run_batch
+
+    assert analyze_plan is analyze_from_module
+    assert callable(analyze_plan_async) and callable(warmup) and callable(run_batch)
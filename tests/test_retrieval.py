@@ -0,0 +1,47 @@
+import importlib
+
+retrieval = importlib.import_module("compliance_rag.retrieval")
+
+
+def test_loaders_keep_only_the_latest_kb_version():
+    loads = []
+
+    @retrieval._latest_version
+    def load(kb_path, version=""):
+        loads.append((kb_path, version))
+        return object()
+
+    v1 = load("kb/kb_all.jsonl", "v1")
+    assert load("kb/kb_all.jsonl", "v1") is v1
+    v2 = load("kb/kb_all.jsonl", "v2")
+    assert v2 is not v1
+    # the superseded version was dropped, not kept alongside
+    assert load("kb/kb_all.jsonl", "v1") is not v1
+    # the binary form of the same KB replaces the JSONL entry too
+    load("kb/kb_all.bin", "v1")
+    load("kb/kb_all.jsonl", "v1")
+    assert loads == [
+        ("kb/kb_all.jsonl", "v1"),
+        ("kb/kb_all.jsonl", "v2"),
+        ("kb/kb_all.jsonl", "v1"),
+        ("kb/kb_all.bin", "v1"),
+        ("kb/kb_all.jsonl", "v1"),
+    ]
+
+
+def test_scaled_per_doc_files_are_ranges_of_kb_all(tmp_path):
+    from benchmarks.synthetic import use_kb, write_scaled_kb
+    from compliance_rag import config
+
+    write_scaled_kb(tmp_path, 2)
+    with use_kb(tmp_path):
+        retrieval.clear_kb_caches()
+        ranges = [
+            retrieval._kb_source(retrieval._resolve_kb_file(str(p)))[2]
+            for p in (config.KB_SBC1101_PATH, config.KB_RES_REQ_PATH)
+        ]
+        kb_all = str(config.KB_ALL_PATH)
+        n_all = len(retrieval._load_chunks(kb_all, retrieval._kb_fingerprint(kb_all)))
+    retrieval.clear_kb_caches()
+
+    assert ranges[0][0] == 0 and ranges[0][1] == ranges[1][0] and ranges[1][1] == n_all
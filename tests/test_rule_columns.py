@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from compliance_rag import rule_columns
+from compliance_rag.rule_columns import RoomColumns, evaluate_rooms_columnar
+from compliance_rag.rule_engine import evaluate_rooms
+from compliance_rag.rules_registry import ROOM_TYPES
+
+_TYPES = sorted(ROOM_TYPES) + ["Garage", "", None]
+
+
+def _value(rng, lo, hi):
+    return rng.choice((
+        round(rng.uniform(lo, hi), 2),
+        rng.randint(int(lo), int(hi)),
+        str(round(rng.uniform(lo, hi), 1)),
+        "n/a",
+        None,
+    ))
+
+
+def _room(rng, i):
+    room = {"id": rng.choice((i, f"r{i}", None)), "type": rng.choice(_TYPES)}
+    if rng.random() < 0.7:
+        room["metrics"] = {"area_sqm": _value(rng, 0, 25), "min_dimension_m": _value(rng, 0, 5)}
+    else:
+        room["area_m2"] = _value(rng, 0, 25)
+        room["min_dimension_m"] = _value(rng, 0, 5)
+    window = rng.choice((True, False, None, "missing"))
+    if window == "missing":
+        pass
+    elif rng.random() < 0.5:
+        room["ventilation"] = {"has_window": window}
+    else:
+        room["has_window"] = window
+    return room
+
+
+def _plans(seed, n=200):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield [_room(rng, i) for i in range(rng.choice((0, 1, rng.randint(2, 40), rng.randint(100, 400))))]
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_columnar_matches_row_wise(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(rule_columns, "np", None)
+    elif rule_columns.np is None:
+        pytest.skip("numpy not installed")
+
+    for rooms in _plans(12):
+        expected = evaluate_rooms(rooms)
+        assert evaluate_rooms_columnar(rooms) == expected
+        assert evaluate_rooms(RoomColumns.from_rooms(rooms)) == expected
+
+
+def test_analyze_plan_accepts_room_columns():
+    from compliance_rag import analyze_plan
+
+    rooms = next(_plans(7, n=1)) or [{"id": 1, "type": "Bedroom", "metrics": {"area_sqm": 3}}]
+    assert analyze_plan(project_id="p", asset_id="a", rooms=RoomColumns.from_rooms(rooms)) == analyze_plan(
+        project_id="p", asset_id="a", rooms=rooms
+    )
@@ -0,0 +1,20 @@
+from compliance_rag.rule_engine import evaluate_rooms
+
+
+def test_findings_do_not_share_the_compiled_evidence_query():
+    rooms = [{"room_id": "r1", "room_type": "Bathroom", "area_m2": 0.5, "min_dimension_m": 0.5, "has_window": False}]
+
+    first = evaluate_rooms(rooms)
+    for item in first["violations"] + first["warnings"]:
+        eq = item.get("evidence_query")
+        if eq:
+            eq["doc"] = "mutated"
+            for v in eq.values():
+                if isinstance(v, list):
+                    v.append("mutated")
+
+    again = evaluate_rooms(rooms)
+    for item in again["violations"] + again["warnings"]:
+        eq = item.get("evidence_query") or {}
+        assert eq.get("doc") != "mutated"
+        assert all("mutated" not in v for v in eq.values() if isinstance(v, list))